@@ -2,12 +2,21 @@
 # Ever Oasis .gmsg export/import (Python port of oasis.lua)
 # Usage:
 #   python oasis_gmsg.py export main.gmsg main.md
-#   python oasis_gmsg.py import main.gmsg main.md main_new.gmsg
+#   python oasis_gmsg.py import main.gmsg main.md main_new.gmsg [--incremental]
+#   python oasis_gmsg.py verify [file.gmsg ...]
+#   python oasis_gmsg.py get main.gmsg 100 [101 ...]
+#   python oasis_gmsg.py batch import|export -o out_dir [--manifest m.json | --glob 'main_*.md']
 
 import argparse
+import fnmatch
+import functools
+import json
+import mmap
 import os
 import re
 import struct
+import sys
+import time
 
 COMMANDS_LENGTH = {
     0x04: 2,
@@ -93,6 +102,43 @@ class BinWriter:
         struct.pack_into("<i", self.buf, self.pos, v)
         self.pos += 4
 
+class ChunkWriter:
+    # Append-only writer for the string pool: pieces are collected in a list
+    # and joined once. Same write_* / tell interface as BinWriter.
+    def __init__(self, base_pos: int = 0):
+        self.chunks = []
+        self.pos = base_pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def write_bytes(self, data: bytes):
+        self.chunks.append(data)
+        self.pos += len(data)
+
+    def write_u8(self, v: int):
+        self.chunks.append(bytes((v & 0xFF,)))
+        self.pos += 1
+
+    def write_u16(self, v: int):
+        self.chunks.append(struct.pack("<H", v & 0xFFFF))
+        self.pos += 2
+
+    def write_i16(self, v: int):
+        self.chunks.append(struct.pack("<h", v))
+        self.pos += 2
+
+    def write_u32(self, v: int):
+        self.chunks.append(struct.pack("<I", v & 0xFFFFFFFF))
+        self.pos += 4
+
+    def write_i32(self, v: int):
+        self.chunks.append(struct.pack("<i", v))
+        self.pos += 4
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
 def write_align2_codepoint(bw: BinWriter, code: int):
     # same logic as oasis.lua:
     # if position is odd -> write 1 byte; else write 2 bytes
@@ -111,7 +157,86 @@ def write_align4_codepoint(bw: BinWriter, code: int) -> int:
         bw.write_u32(code)
         return 2
 
-def parse_bytes_string(msg_bytes: bytes) -> str:
+# 0x00 and 0x7F are the only bytes that end a text run
+CONTROL_RE = re.compile(rb"[\x00\x7f]")
+
+SIMPLE_TAGS = {
+    0x0001: "<br>",
+    0x0002: "<hr>",
+    0x0003: "<waitbutton>",
+    0x000D: "<playername>",
+}
+
+def _parse_control(msg_bytes, pos: int, r1: int, out: list) -> int:
+    # pos is just past the (aligned) 0x7F code r1; returns the new pos
+    if r1 in COMMANDS_LENGTH:
+        ln = COMMANDS_LENGTH[r1]
+        if ln > 0:
+            pos = align_to(pos, 4)
+
+        codes = [f"0x{r1:x}"]
+        for short in struct.unpack_from(f"<{ln}H", msg_bytes, pos):
+            if short != 0x0000:
+                codes.append(f"0x{short:x}")
+        pos += 2 * ln
+
+        out.append("[" + ", ".join(codes) + "]")
+    elif r1 == 0x0019:
+        pos = align_to(pos, 4)
+        short1, short2 = struct.unpack_from("<HH", msg_bytes, pos)
+        pos += 4
+
+        if short1 == 0xFFFF and short2 == 0xFFFF:
+            out.append("</span>")
+        else:
+            out.append(f'<span class="color-{short1}">')
+    else:
+        out.append(f"[0x{r1:x}]")
+    return pos
+
+def parse_bytes_string(msg_bytes) -> str:
+    # Text runs are decoded as whole slices; only 0x00/0x7F bytes go through
+    # the control code handler. Same output as _parse_bytes_string_ref.
+    out = []
+    pos = 0
+    end = len(msg_bytes)
+    search = CONTROL_RE.search
+    unpack_from = struct.unpack_from
+
+    while pos < end:
+        m = search(msg_bytes, pos)
+        stop = m.start() if m else end
+        if stop > pos:
+            run = msg_bytes[pos:stop]
+            # decode as utf-8 if possible; fallback to latin-1 (keeps bytes 1:1)
+            try:
+                out.append(str(run, "utf-8"))
+            except UnicodeDecodeError:
+                out.append(str(run, "latin-1"))
+        if m is None:
+            break
+
+        pos = stop + 1
+        if msg_bytes[stop] == 0x00:
+            out.append("[0x0]")
+            continue
+
+        if pos % 2 != 0:
+            pos += 1
+        r1 = unpack_from("<H", msg_bytes, pos)[0]
+        pos += 2
+
+        if r1 == 0x0000:
+            break
+        tag = SIMPLE_TAGS.get(r1)
+        if tag:
+            out.append(tag)
+        else:
+            pos = _parse_control(msg_bytes, pos, r1, out)
+
+    return "".join(out)
+
+def _parse_bytes_string_ref(msg_bytes: bytes) -> str:
     out = []
     pos = 0
     text_run = bytearray()
@@ -181,13 +306,11 @@ def parse_bytes_string(msg_bytes: bytes) -> str:
     flush_text()
     return "".join(out)
 
-def export_gmsg(input_path: str, output_md: str):
-    data = open(input_path, "rb").read()
-
+def iter_messages(data: bytes):
+    # yields (mid, msg_bytes) in table order
     entry_count, _ = read_i32le(data, 0x0C)
     pos, _ = read_i32le(data, 0x10)
 
-    msgs = []
     p = pos
     for _ in range(entry_count):
         mid, p = read_i32le(data, p)
@@ -195,163 +318,482 @@ def export_gmsg(input_path: str, output_md: str):
         off, p = read_i32le(data, p)
         ln, p = read_i32le(data, p)
 
-        msg_bytes = data[off:off+ln]
-        msgs.append((mid, msg_bytes))
+        yield mid, data[off:off+ln]
 
-    with open(output_md, "w", encoding="utf-8", newline="\n") as f:
-        for mid, bts in msgs:
-            txt = parse_bytes_string(bts)
-            f.write(f"{mid}|{txt}|\n")
+class GmsgFile:
+    # Random access to one gmsg: the file is mmapped, only the entry table is
+    # read up front and messages are decoded on first access (LRU cached).
+    #
+    #   with GmsgFile.open("main.gmsg") as g:
+    #       print(g[100])
 
-def find_next(chars, start, target):
-    for j in range(start, len(chars)):
-        if chars[j] == target:
-            return j
-    return -1
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
 
-SPAN_RE = re.compile(r'span class="color\-([0-9]+)"')
+        entry_count, _ = read_i32le(self._mm, 0x0C)
+        table_pos, _ = read_i32le(self._mm, 0x10)
+        table = self._mm[table_pos:table_pos + entry_count * 16]
 
-def write_string_line(line_id: int, s: str, bw: BinWriter) -> int:
-    chars = list(s)
-    i = 0
-    while i < len(chars):
-        c = chars[i]
+        # mid -> (offset, length), in table order
+        self.index = {mid: (off, ln) for mid, _, off, ln in struct.iter_unpack("<4i", table)}
+        self._decode = functools.lru_cache(maxsize=cache_size)(self._decode_uncached)
 
-        if c == "[":
-            j = find_next(chars, i, "]")
-            if j == -1:
-                raise ValueError(f"Error in line {line_id}: missing ']' in {s}")
+    @classmethod
+    def open(cls, path: str, cache_size: int = 1024) -> "GmsgFile":
+        return cls(path, cache_size)
 
-            inside = "".join(chars[i+1:j]).strip()
-            tokens = [t for t in re.split(r"[,\s]+", inside) if t]
-            codes = [int(t, 16) for t in tokens]
+    def close(self):
+        if self._mm is not None:
+            self._decode.cache_clear()
+            self._mm.close()
+            self._f.close()
+            self._mm = None
 
-            first_code = codes[0]
-            if first_code == 0x0:
-                bw.write_u8(0x00)
-            else:
-                write_align2_codepoint(bw, 0x7F)
+    def __enter__(self):
+        return self
 
-                if first_code not in COMMANDS_LENGTH:
-                    raise ValueError(f"unrecognized code in line id={line_id}: {inside}")
+    def __exit__(self, *exc):
+        self.close()
 
-                ln = COMMANDS_LENGTH[first_code]
-                args = codes[1:]
+    def __len__(self) -> int:
+        return len(self.index)
 
-                if ln > 0:
-                    write_align4_codepoint(bw, first_code)
-                else:
-                    bw.write_u16(first_code)
+    def __contains__(self, mid) -> bool:
+        return mid in self.index
 
-                if first_code == 0x09:
-                    bw.write_u16(args[0] if len(args) > 0 else 0)
-                    bw.write_u16(args[1] if len(args) > 1 else 0)
-                else:
-                    # match oasis.lua's weird packing: write (ln-1) int32 values
-                    for k in range(ln - 1):
-                        if k < len(args):
-                            bw.write_u32(args[k])
-                        else:
-                            bw.write_u16(0x0000)
-                            bw.write_u16(0x0000)
+    def __iter__(self):
+        return iter(self.index)
+
+    def raw(self, mid: int) -> bytes:
+        off, ln = self.index[mid]
+        return self._mm[off:off + ln]
+
+    def _decode_uncached(self, mid: int) -> str:
+        return parse_bytes_string(self.raw(mid))
+
+    def __getitem__(self, mid: int) -> str:
+        if mid not in self.index:
+            raise KeyError(mid)
+        return self._decode(mid)
+
+    def get(self, mid: int, default=None):
+        return self[mid] if mid in self.index else default
+
+    def items(self):
+        for mid in self.index:
+            yield mid, self[mid]
+
+def export_gmsg(input_path: str, output_md: str):
+    data = open(input_path, "rb").read()
+
+    msgs = list(iter_messages(data))
+
+    with open(output_md, "w", encoding="utf-8", newline="\n") as f:
+        for mid, bts in msgs:
+            txt = parse_bytes_string(bts)
+            f.write(f"{mid}|{txt}|\n")
+
+def verify_gmsg(paths):
+    # fast parser vs. the original byte-at-a-time one, for every message
+    failed = 0
+    for path in paths:
+        data = open(path, "rb").read()
+        msgs = list(iter_messages(data))
+
+        t0 = time.perf_counter()
+        fast = [parse_bytes_string(b) for _, b in msgs]
+        t_fast = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ref = [_parse_bytes_string_ref(b) for _, b in msgs]
+        t_ref = time.perf_counter() - t0
+
+        bad = [mid for (mid, _), a, b in zip(msgs, fast, ref) if a != b]
+        status = "OK" if not bad else "FAIL"
+        print(f"{status}: {path}: {len(msgs)} messages, {len(bad)} differ, "
+              f"fast {t_fast*1000:.0f} ms, ref {t_ref*1000:.0f} ms ({t_ref / max(t_fast, 1e-9):.1f}x)")
+        for mid in bad[:5]:
+            print(f"  differs: id {mid}")
+        failed += bool(bad)
+    return failed
+
+SPAN_RE = re.compile(r'span class="color\-([0-9]+)"')
+
+# One token per markup tag or text run; a lone '[' / '<' is an unclosed tag
+TOKEN_RE = re.compile(r"\[[^\]]*\]|<[^>]*>|[^\[<]+|[\[<]")
 
-            i = j
+# (tag text, position % 4) -> encoded bytes. The alignment rules only look
+# at pos % 2 and (pos // 2) % 2, so the bytes of a tag depend on nothing else.
+_TAG_CACHE = {}
+_TERMINATOR_CACHE = {}
 
-        elif c == "<":
-            j = find_next(chars, i, ">")
-            if j == -1:
-                raise ValueError(f"Error in line {line_id}: missing '>' in {s}")
+def _write_tag(line_id: int, s: str, token: str, bw):
+    if token[0] == "[":
+        if len(token) < 2 or token[-1] != "]":
+            raise ValueError(f"Error in line {line_id}: missing ']' in {s}")
 
-            tag = "".join(chars[i+1:j])
+        inside = token[1:-1].strip()
+        tokens = [t for t in re.split(r"[,\s]+", inside) if t]
+        codes = [int(t, 16) for t in tokens]
 
+        first_code = codes[0]
+        if first_code == 0x0:
+            bw.write_u8(0x00)
+        else:
             write_align2_codepoint(bw, 0x7F)
 
-            if tag == "br":
-                bw.write_u16(0x01)
-            elif tag == "hr":
-                bw.write_u16(0x02)
-            elif tag == "waitbutton":
-                bw.write_u16(0x03)
-            elif tag == "playername":
-                bw.write_u16(0x0D)
-            elif tag.startswith('span '):
-                m = SPAN_RE.search(tag)
-                if not m:
-                    raise ValueError(f'Invalid span tag in line {line_id}: <{tag}>')
-                color = int(m.group(1))
-                write_align4_codepoint(bw, 0x19)
-                bw.write_u16(color)
-                bw.write_u16(0x0000)
-            elif "/span" in tag:
-                write_align4_codepoint(bw, 0x19)
-                bw.write_u16(0xFFFF)
-                bw.write_u16(0xFFFF)
+            args = codes[1:]
+            if first_code not in COMMANDS_LENGTH:
+                if args:
+                    raise ValueError(f"unrecognized code in line id={line_id}: {inside}")
+                # export writes unknown codes as a bare [0xNN]; write them back the same way
+                bw.write_u16(first_code)
+                return
+
+            ln = COMMANDS_LENGTH[first_code]
+
+            if ln > 0:
+                write_align4_codepoint(bw, first_code)
             else:
-                raise ValueError(f"Invalid tag in line {line_id}: <{tag}>")
+                bw.write_u16(first_code)
 
-            i = j
+            if first_code == 0x09:
+                bw.write_u16(args[0] if len(args) > 0 else 0)
+                bw.write_u16(args[1] if len(args) > 1 else 0)
+            else:
+                # match oasis.lua's weird packing: write (ln-1) int32 values
+                for k in range(ln - 1):
+                    if k < len(args):
+                        bw.write_u32(args[k])
+                    else:
+                        bw.write_u16(0x0000)
+                        bw.write_u16(0x0000)
 
+    else:
+        if len(token) < 2 or token[-1] != ">":
+            raise ValueError(f"Error in line {line_id}: missing '>' in {s}")
+
+        tag = token[1:-1]
+
+        write_align2_codepoint(bw, 0x7F)
+
+        if tag == "br":
+            bw.write_u16(0x01)
+        elif tag == "hr":
+            bw.write_u16(0x02)
+        elif tag == "waitbutton":
+            bw.write_u16(0x03)
+        elif tag == "playername":
+            bw.write_u16(0x0D)
+        elif tag.startswith('span '):
+            m = SPAN_RE.search(tag)
+            if not m:
+                raise ValueError(f'Invalid span tag in line {line_id}: <{tag}>')
+            color = int(m.group(1))
+            write_align4_codepoint(bw, 0x19)
+            bw.write_u16(color)
+            bw.write_u16(0x0000)
+        elif "/span" in tag:
+            write_align4_codepoint(bw, 0x19)
+            bw.write_u16(0xFFFF)
+            bw.write_u16(0xFFFF)
         else:
-            bw.write_bytes(c.encode("utf-8"))
-
-        i += 1
+            raise ValueError(f"Invalid tag in line {line_id}: <{tag}>")
+
+def write_string_line(line_id: int, s: str, bw) -> int:
+    for token in TOKEN_RE.findall(s):
+        if token[0] == "[" or token[0] == "<":
+            key = (token, bw.tell() & 3)
+            blob = _TAG_CACHE.get(key)
+            if blob is None:
+                tmp = ChunkWriter(key[1])
+                _write_tag(line_id, s, token, tmp)
+                blob = _TAG_CACHE[key] = tmp.getvalue()
+            bw.write_bytes(blob)
+        else:
+            bw.write_bytes(token.encode("utf-8"))
 
     # terminator sequence
-    write_align2_codepoint(bw, 0x7F)
-    return write_align4_codepoint(bw, 0x00)
-
-def import_gmsg(input_gmsg: str, input_md: str, output_gmsg: str):
+    phase = bw.tell() & 3
+    cached = _TERMINATOR_CACHE.get(phase)
+    if cached is None:
+        tmp = ChunkWriter(phase)
+        write_align2_codepoint(tmp, 0x7F)
+        align = write_align4_codepoint(tmp, 0x00)
+        cached = _TERMINATOR_CACHE[phase] = (tmp.getvalue(), align)
+    bw.write_bytes(cached[0])
+    return cached[1]
+
+def read_md(input_md: str) -> dict:
     lines = {}
     with open(input_md, "r", encoding="utf-8", errors="strict") as f:
         for raw in f:
             raw = raw.rstrip("\n")
             if not raw:
                 continue
-            m = re.match(r"([^|]+)\|([^|]*)\|", raw)
-            if not m:
+            # "mid|text|", anything after the second '|' is ignored
+            parts = raw.split("|", 2)
+            if len(parts) < 3 or not parts[0]:
                 raise ValueError(f"Bad line format: {raw}")
-            mid = int(m.group(1))
-            text = m.group(2)
-            lines[mid] = text
-
-    data = open(input_gmsg, "rb").read()
+            lines[int(parts[0])] = parts[1]
+    return lines
 
+def read_table(data: bytes):
+    # (table_pos, flat tuple of id, unknown, offset, length per entry)
     entry_count, _ = read_i32le(data, 0x0C)
     table_pos, _ = read_i32le(data, 0x10)
+    return table_pos, struct.unpack_from(f"<{entry_count * 4}i", data, table_pos)
 
-    header_and_table_size = (entry_count * 16) + table_pos
-    bw = BinWriter(data[:header_and_table_size])
+def build_gmsg(data: bytes, lines: dict, cache: dict = None, parsed=None) -> bytes:
+    # cache: mid -> (text, pos % 4, align, encoded bytes) from an earlier
+    # build. An entry is reused only if the text and the alignment phase both
+    # match, since the padding bytes depend on where the message starts.
+    # parsed: read_table(data), when the caller already has it.
+    table_pos, table = parsed or read_table(data)
+    table = list(table)
 
-    p = table_pos
-    for _ in range(entry_count):
-        this_table_pos = p
+    header_and_table_size = len(table) * 4 + table_pos
+    pool = ChunkWriter(header_and_table_size)
 
-        mid, p = read_i32le(data, p)
-        unknown, p = read_i32le(data, p)
-        _, p = read_i32le(data, p)  # old offset
-        _, p = read_i32le(data, p)  # old length
+    for k in range(0, len(table), 4):
+        mid = table[k]
 
         if mid not in lines:
             raise ValueError(f"Missing id {mid} in md file")
 
         s = lines[mid]
         if len(s) > 0:
-            new_offset = bw.tell()
-            align = write_string_line(mid, s, bw)
-            end_pos = bw.tell()
-            new_len = (end_pos - new_offset - align)
-
-            # rewrite table entry
-            cur = bw.tell()
-            bw.seek(this_table_pos)
-            bw.write_i32(mid)
-            bw.write_i32(unknown)
-            bw.write_i32(new_offset)
-            bw.write_i32(new_len)
-            bw.seek(cur)
+            new_offset = pool.tell()
+            if cache is None:
+                align = write_string_line(mid, s, pool)
+            else:
+                phase = new_offset & 3
+                hit = cache.get(mid)
+                if hit and hit[1] == phase and hit[0] == s:
+                    align = hit[2]
+                    pool.write_bytes(hit[3])
+                else:
+                    first = len(pool.chunks)
+                    align = write_string_line(mid, s, pool)
+                    cache[mid] = (s, phase, align, b"".join(pool.chunks[first:]))
+            new_len = (pool.tell() - new_offset - align)
+
+            # table entry: id and unknown stay, offset/length are replaced
+            table[k + 2] = new_offset
+            table[k + 3] = new_len
+
+    if cache is not None:
+        # drop ids that are gone from the table or now empty
+        live = {table[k] for k in range(0, len(table), 4) if lines[table[k]]}
+        for key in [key for key in cache if key not in live]:
+            del cache[key]
+
+    return b"".join((data[:table_pos], struct.pack(f"<{len(table)}i", *table), pool.getvalue()))
+
+# Sidecar cache for import --incremental:
+#   header, then one record per message, then all texts (utf-8), then all encodings
+_CACHE_HEAD = struct.Struct("<4sIIII")  # magic, version, record count, text/encoded block sizes
+_CACHE_REC = struct.Struct("<iBBxxIIII")  # mid, pos % 4, align, text off/len, encoded off/len
+CACHE_MAGIC = b"GMIC"
+CACHE_VERSION = 2
+
+def load_import_cache(path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+        magic, version, count, text_size, enc_size = _CACHE_HEAD.unpack_from(blob, 0)
+    except (OSError, struct.error):
+        return {}
+    rec_end = _CACHE_HEAD.size + count * _CACHE_REC.size
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or len(blob) != rec_end + text_size + enc_size:
+        return {}
+
+    # text offsets are in characters, so the whole block is decoded once
+    texts = blob[rec_end:rec_end + text_size].decode("utf-8", errors="replace")  # bad text only misses
+    enc = memoryview(blob)[rec_end + text_size:]
+    return {mid: (texts[t_off:t_off + t_len], phase, align, enc[e_off:e_off + e_len])
+            for mid, phase, align, t_off, t_len, e_off, e_len
+            in _CACHE_REC.iter_unpack(blob[_CACHE_HEAD.size:rec_end])}
+
+def save_import_cache(path: str, entries: dict):
+    recs = []
+    texts = []
+    encs = []
+    t_pos = e_pos = 0
+    for mid, (text, phase, align, enc) in entries.items():
+        recs.append(_CACHE_REC.pack(mid, phase, align, t_pos, len(text), e_pos, len(enc)))
+        texts.append(text)
+        encs.append(enc)
+        t_pos += len(text)
+        e_pos += len(enc)
+
+    text_block = "".join(texts).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_CACHE_HEAD.pack(CACHE_MAGIC, CACHE_VERSION, len(recs), len(text_block), e_pos))
+        f.write(b"".join(recs))
+        f.write(text_block)
+        f.write(b"".join(encs))
+    os.replace(tmp, path)
+
+def import_gmsg(input_gmsg: str, input_md: str, output_gmsg: str, cache_path: str = None):
+    lines = read_md(input_md)
+    data = open(input_gmsg, "rb").read()
+
+    cache = load_import_cache(cache_path) if cache_path else None
+    before = dict(cache or {})
+    out = build_gmsg(data, lines, cache)
 
     with open(output_gmsg, "wb") as f:
-        f.write(bw.buf)
+        f.write(out)
+
+    if cache_path:
+        # entries that were not replaced were reused as-is
+        reused = sum(1 for key, entry in cache.items() if before.get(key) is entry)
+        if reused != len(cache) or len(before) != len(cache):
+            save_import_cache(cache_path, cache)
+        return reused
+
+def bench_import(md_paths, rounds: int = 3):
+    # time build_gmsg per language; a main_xx.md is built on main_xx.gmsg when
+    # that exists (and must then reproduce it), otherwise on main.gmsg
+    failed = 0
+    total = 0.0
+    for md in md_paths:
+        folder = os.path.dirname(md)
+        stem = os.path.splitext(os.path.basename(md))[0]
+        own = os.path.join(folder, stem + ".gmsg")
+        base = own if os.path.exists(own) else os.path.join(folder, "main.gmsg")
+        data = open(base, "rb").read()
+
+        try:
+            lines = read_md(md)
+            _TAG_CACHE.clear()
+            _TERMINATOR_CACHE.clear()
+            t0 = time.perf_counter()
+            out = build_gmsg(data, lines)
+            t_cold = time.perf_counter() - t0
+            t_warm = float("inf")
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                build_gmsg(data, lines)
+                t_warm = min(t_warm, time.perf_counter() - t0)
+        except ValueError as e:
+            print(f"FAIL: {md}: {e}")
+            failed += 1
+            continue
+
+        note = ""
+        if base == own:
+            note = ", same as base" if out == data else ", DIFFERS from base"
+            failed += out != data
+        total += t_warm
+        print(f"{os.path.basename(md)} -> {os.path.basename(base)}: {len(lines)} lines, {len(out)} bytes, "
+              f"cold {t_cold*1000:.0f} ms, warm {t_warm*1000:.0f} ms{note}")
+    print(f"total warm: {total*1000:.0f} ms, {len(_TAG_CACHE)} cached tags")
+    return failed
+
+# --- batch mode ---------------------------------------------------------------
+
+_BATCH_BASE = {}
+
+def _batch_init(base_path: str, data: bytes, parsed):
+    # runs once per worker: the shared base is sent over once, not per job
+    _BATCH_BASE[base_path] = (data, parsed)
+
+def _batch_job(mode: str, lang: str, src: str, dst: str, base: str):
+    t0 = time.perf_counter()
+    lines = 0
+    try:
+        if mode == "export":
+            data = open(src, "rb").read()
+            with open(dst, "w", encoding="utf-8", newline="\n") as f:
+                for mid, bts in iter_messages(data):
+                    f.write(f"{mid}|{parse_bytes_string(bts)}|\n")
+                    lines += 1
+        else:
+            shared = _BATCH_BASE.get(base)
+            if shared is None:
+                data = open(base, "rb").read()
+                shared = (data, read_table(data))
+            md = read_md(src)
+            lines = len(md)
+            out = build_gmsg(shared[0], md, parsed=shared[1])
+            with open(dst, "wb") as f:
+                f.write(out)
+    except Exception as e:
+        # one bad file (e.g. "[]" in an md, a truncated gmsg) must not stop the batch
+        size = os.path.getsize(src) if os.path.exists(src) else 0
+        if mode == "export" and os.path.exists(dst):
+            os.remove(dst)  # don't leave a half-written md behind
+        kind = type(e).__name__ if type(e).__module__ == "builtins" else f"{type(e).__module__}.{type(e).__name__}"
+        err = str(e) if isinstance(e, (OSError, ValueError)) else f"{kind}: {e}"
+        return lang, lines, size, 0, time.perf_counter() - t0, err
+    return lang, lines, os.path.getsize(src), os.path.getsize(dst), time.perf_counter() - t0, None
+
+def _lang_of(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem[5:] if stem.startswith("main_") else stem
+
+def load_batch_pairs(mode: str, manifest: str = None, pattern: str = None, folder: str = "."):
+    # returns (base gmsg, [(lang, src, base for this language)]).
+    # manifest (json): {"base": "main.gmsg",
+    #                   "languages": {"tr": {"md": "main_tr.md", "gmsg": "main_tr.gmsg", "base": "..."}}}
+    # paths in a manifest are relative to the manifest itself.
+    if manifest:
+        folder = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            m = json.load(f)
+        base = os.path.join(folder, m.get("base", "main.gmsg"))
+        jobs = []
+        for lang, entry in m["languages"].items():
+            key = "gmsg" if mode == "export" else "md"
+            if key not in entry:
+                continue
+            src = os.path.join(folder, entry[key])
+            jobs.append((lang, src, os.path.join(folder, entry["base"]) if "base" in entry else base))
+        return base, jobs
+
+    pattern = pattern or ("main*.gmsg" if mode == "export" else "main_*.md")
+    base = os.path.join(folder, "main.gmsg")
+    names = sorted(n for n in os.listdir(folder) if fnmatch.fnmatch(n, pattern))
+    return base, [(_lang_of(n), os.path.join(folder, n), base) for n in names]
+
+def batch_run(mode: str, jobs, base: str, out_dir: str, workers: int = None):
+    ext = ".md" if mode == "export" else ".gmsg"
+    todo = []
+    for lang, src, job_base in jobs:
+        stem = os.path.splitext(os.path.basename(src))[0]
+        dst = os.path.join(out_dir, stem + ext)
+        # main_fr.md imports to main_fr.gmsg, so the sources' own folder is off limits
+        if os.path.dirname(os.path.abspath(dst)) == os.path.dirname(os.path.abspath(src)):
+            raise ValueError(f"output folder must differ from the input folder: {out_dir}")
+        todo.append((mode, lang, src, dst, job_base))
+    os.makedirs(out_dir, exist_ok=True)
+
+    init_args = ("", b"", None)
+    if mode == "import" and os.path.exists(base):
+        data = open(base, "rb").read()
+        init_args = (base, data, read_table(data))
+
+    import concurrent.futures  # only batch needs it; keeps single imports fast to start
+
+    t0 = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_batch_init,
+                                                initargs=init_args) as ex:
+        results = list(ex.map(_batch_job, *zip(*todo))) if todo else []
+    wall = time.perf_counter() - t0
+
+    print(f"{'lang':<8} {'lines':>6} {'in bytes':>10} {'out bytes':>10} {'ms':>6}  status")
+    failed = 0
+    for lang, lines, in_size, out_size, secs, err in results:
+        print(f"{lang:<8} {lines:>6} {in_size:>10} {out_size:>10} {secs*1000:>6.0f}  {err or 'OK'}")
+        failed += err is not None
+    busy = sum(r[4] for r in results)
+    print(f"{len(results)} files, {failed} failed, wall {wall*1000:.0f} ms, sum of jobs {busy*1000:.0f} ms -> {out_dir}")
+    return failed
 
 def resolve_in(path: str, exts):
     if os.path.exists(path):
@@ -374,6 +816,31 @@ def main():
     ap_imp.add_argument("input_gmsg", help="main.gmsg (or just main)")
     ap_imp.add_argument("input_md", help="main.md (or just main)")
     ap_imp.add_argument("output_gmsg", help="main_new.gmsg (or just main_new)")
+    ap_imp.add_argument("--incremental", action="store_true",
+                        help="reuse encodings of unchanged lines from the previous import")
+    ap_imp.add_argument("--cache", help="cache file for --incremental (default: <output_gmsg>.cache)")
+
+    ap_ver = sub.add_parser("verify")
+    ap_ver.add_argument("inputs", nargs="*",
+                        help="gmsg files to check (default: every .gmsg next to this script, recursive)")
+
+    ap_bench = sub.add_parser("bench")
+    ap_bench.add_argument("inputs", nargs="*",
+                          help="md files to import (default: every main_*.md next to this script)")
+    ap_bench.add_argument("-n", "--rounds", type=int, default=3, help="warm runs per file (best is shown)")
+
+    ap_get = sub.add_parser("get")
+    ap_get.add_argument("input", help="main.gmsg (or just main)")
+    ap_get.add_argument("ids", nargs="+", type=int, help="message ids")
+
+    ap_batch = sub.add_parser("batch")
+    ap_batch.add_argument("mode", choices=["export", "import"])
+    ap_batch.add_argument("-o", "--out", required=True, help="output folder")
+    ap_batch.add_argument("--manifest", help="json manifest of language pairs")
+    ap_batch.add_argument("--glob", help="file pattern next to this script "
+                                         "(default: main*.gmsg for export, main_*.md for import)")
+    ap_batch.add_argument("--base", help="base gmsg for import (default: main.gmsg)")
+    ap_batch.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
 
     args = ap.parse_args()
 
@@ -387,8 +854,49 @@ def main():
         inp_g = resolve_in(args.input_gmsg, [".gmsg"])
         inp_m = resolve_in(args.input_md, [".md"])
         out_g = args.output_gmsg if args.output_gmsg.lower().endswith(".gmsg") else (args.output_gmsg + ".gmsg")
-        import_gmsg(inp_g, inp_m, out_g)
-        print(f"OK: imported -> {out_g}")
+        if args.incremental or args.cache:
+            cache_path = args.cache or (out_g + ".cache")
+            reused = import_gmsg(inp_g, inp_m, out_g, cache_path)
+            print(f"OK: imported -> {out_g} ({reused} lines reused from {cache_path})")
+        else:
+            import_gmsg(inp_g, inp_m, out_g)
+            print(f"OK: imported -> {out_g}")
+
+    elif args.cmd == "verify":
+        here = os.path.dirname(os.path.abspath(__file__))
+        inputs = args.inputs or sorted(
+            os.path.join(root, n) for root, _, files in os.walk(here) for n in files if n.endswith(".gmsg"))
+        sys.exit(1 if verify_gmsg(inputs) else 0)
+
+    elif args.cmd == "bench":
+        here = os.path.dirname(os.path.abspath(__file__))
+        inputs = args.inputs or sorted(
+            os.path.join(here, n) for n in os.listdir(here) if n.startswith("main_") and n.endswith(".md"))
+        sys.exit(1 if bench_import(inputs, args.rounds) else 0)
+
+    elif args.cmd == "get":
+        missing = 0
+        with GmsgFile.open(resolve_in(args.input, [".gmsg"])) as g:
+            for mid in args.ids:
+                if mid in g:
+                    print(f"{mid}|{g[mid]}|")
+                else:
+                    print(f"ERROR: no message with id {mid}")
+                    missing += 1
+        sys.exit(1 if missing else 0)
+
+    elif args.cmd == "batch":
+        here = os.path.dirname(os.path.abspath(__file__))
+        base, jobs = load_batch_pairs(args.mode, args.manifest, args.glob, here)
+        if args.base:
+            base = resolve_in(args.base, [".gmsg"])
+            jobs = [(lang, src, base) for lang, src, _ in jobs]
+        try:
+            failed = batch_run(args.mode, jobs, base, args.out, args.jobs)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(2)
+        sys.exit(1 if failed else 0)
 
 if __name__ == "__main__":
     main()
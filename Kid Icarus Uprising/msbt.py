@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+MSBT (MsgStdBn) okuyucu/yazıcı.
+
+Dosya bir memoryview üzerinden açılır; LBL1/ATR1/TXT2 bölümleri ancak ilk
+erişimde ayrıştırılır, metinler de tek tek (istendiğinde) çözülür.
+Değiştirilmeyen metinler ham baytlarıyla geri yazıldığı için
+`to_bytes()` düzenleme yapılmamış bir dosyayı birebir aynı üretir.
+
+`compile`, çevrilmiş .xmsbt dosyalarını eşleşen .msbt'yi (../en ya da ../all) şablon alarak
+(etiketler/öznitelikler ondan gelir) doğrudan .msbt'ye derler.
+
+Kullanım:
+  python msbt.py dump "dosya.msbt"
+  python msbt.py verify "KLASOR" ["KLASOR2" ...]
+  python msbt.py compile "translation/stage/tr" [-t "SABLON_KLASORU"] [-j 0]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"MsgStdBn"
+HEADER_SIZE = 0x20
+SECTION_HEADER_SIZE = 0x10
+SECTION_ALIGN = 0x10
+SECTION_PAD = b"\xab"
+
+XMSBT_CHUNK = 1 << 16
+BUILD_CACHE = "xmsbt_build.json"
+BUILD_CACHE_VERSION = 1
+# Default template folders, relative to the .xmsbt's folder (tr -> en, stage/tr -> stage/all)
+TEMPLATE_DIRS = ("../en", "../all")
+
+# Header byte 0x0C
+ENCODINGS = {0: "utf-8", 1: "utf-16", 2: "utf-32"}
+CHAR_SIZES = {"utf-8": 1, "utf-16": 2, "utf-32": 4}
+
+
+class MSBTError(ValueError):
+    pass
+
+
+class MSBT:
+    """
+    Lazily parsed MSBT.
+
+    Only the header and the section table are read on open. `labels`,
+    `attributes` and text lookups parse their section on first use;
+    texts are decoded one by one and cached.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.data = memoryview(data)
+        if bytes(self.data[:8]) != MAGIC:
+            raise MSBTError("MsgStdBn imzası yok")
+
+        bom = bytes(self.data[8:10])
+        if bom == b"\xff\xfe":
+            self.endian = "<"
+        elif bom == b"\xfe\xff":
+            self.endian = ">"
+        else:
+            raise MSBTError(f"Geçersiz BOM: {bom.hex()}")
+
+        enc = ENCODINGS.get(self.data[0x0C])
+        if enc is None:
+            raise MSBTError(f"Bilinmeyen encoding: {self.data[0x0C]}")
+        self.char_size = CHAR_SIZES[enc]
+        if enc == "utf-8":
+            self.encoding = enc
+        else:
+            self.encoding = enc + ("-le" if self.endian == "<" else "-be")
+
+        self.header = bytes(self.data[:HEADER_SIZE])
+        count = self._u16(0x0E)
+
+        # [(magic, section data view)] in file order
+        self.sections: List[Tuple[bytes, memoryview]] = []
+        off = HEADER_SIZE
+        for _ in range(count):
+            if off + SECTION_HEADER_SIZE > len(self.data):
+                raise MSBTError(f"Bölüm tablosu dosya dışına taşıyor (0x{off:X})")
+            magic = bytes(self.data[off:off+4])
+            size = self._u32(off + 4)
+            start = off + SECTION_HEADER_SIZE
+            self.sections.append((magic, self.data[start:start+size]))
+            off = start + size
+            off += -off % SECTION_ALIGN
+
+        self._labels: Optional[Dict[str, int]] = None
+        self._attributes: Optional[List[bytes]] = None
+        self._text_offsets: Optional[List[int]] = None
+        self._texts: Dict[int, str] = {}
+        self._edited: Dict[int, str] = {}
+
+    @classmethod
+    def from_file(cls, path: Path) -> "MSBT":
+        return cls(Path(path).read_bytes())
+
+    def _u16(self, off: int, view=None) -> int:
+        return struct.unpack_from(self.endian + "H", self.data if view is None else view, off)[0]
+
+    def _u32(self, off: int, view=None) -> int:
+        return struct.unpack_from(self.endian + "I", self.data if view is None else view, off)[0]
+
+    def section(self, magic: bytes) -> Optional[memoryview]:
+        for m, view in self.sections:
+            if m == magic:
+                return view
+        return None
+
+    # --- LBL1 ---------------------------------------------------------------
+
+    @property
+    def labels(self) -> Dict[str, int]:
+        """{label: text index}, in hash table order."""
+        if self._labels is None:
+            self._labels = {}
+            view = self.section(b"LBL1")
+            if view is not None:
+                slots = self._u32(0, view)
+                for n, off in struct.iter_unpack(self.endian + "II", view[4:4 + slots * 8]):
+                    for _ in range(n):
+                        size = view[off]
+                        name = bytes(view[off+1:off+1+size]).decode("ascii")
+                        self._labels[name] = self._u32(off + 1 + size, view)
+                        off += 1 + size + 4
+        return self._labels
+
+    def label_order(self) -> List[str]:
+        """Labels sorted by text index (the order texts appear in TXT2)."""
+        return sorted(self.labels, key=self.labels.__getitem__)
+
+    # --- ATR1 ---------------------------------------------------------------
+
+    @property
+    def attributes(self) -> List[bytes]:
+        """Raw attribute record per text index (empty if ATR1 has none)."""
+        if self._attributes is None:
+            view = self.section(b"ATR1")
+            self._attributes = []
+            if view is not None:
+                count = self._u32(0, view)
+                size = self._u32(4, view)
+                if size:
+                    self._attributes = [bytes(view[8 + i*size:8 + (i+1)*size]) for i in range(count)]
+        return self._attributes
+
+    # --- TXT2 ---------------------------------------------------------------
+
+    def _offsets(self) -> List[int]:
+        if self._text_offsets is None:
+            view = self.section(b"TXT2")
+            if view is None:
+                self._text_offsets = [0]
+            else:
+                count = self._u32(0, view)
+                fmt = f"{self.endian}{count}I"
+                self._text_offsets = list(struct.unpack_from(fmt, view, 4)) + [len(view)]
+        return self._text_offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets()) - 1
+
+    def raw_text(self, index: int) -> memoryview:
+        """Encoded string including its terminator (zero-copy)."""
+        offsets = self._offsets()
+        return self.section(b"TXT2")[offsets[index]:offsets[index + 1]]
+
+    def text(self, key: Union[int, str]) -> str:
+        """Text by index or label, without the terminator. Control codes stay as raw characters."""
+        index = self.labels[key] if isinstance(key, str) else key
+        if index in self._edited:
+            return self._edited[index]
+        text = self._texts.get(index)
+        if text is None:
+            raw = self.raw_text(index)
+            text = bytes(raw[:len(raw) - self.char_size]).decode(self.encoding)
+            self._texts[index] = text
+        return text
+
+    __getitem__ = text
+
+    def __setitem__(self, key: Union[int, str], value: str) -> None:
+        index = self.labels[key] if isinstance(key, str) else key
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        self._edited[index] = value
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """(label, text) in text index order."""
+        for label in self.label_order():
+            yield label, self.text(label)
+
+    # --- Serialize ----------------------------------------------------------
+
+    def _build_txt2(self) -> bytes:
+        count = len(self)
+        out = bytearray(struct.pack(self.endian + "I", count))
+        out += b"\x00" * (4 * count)
+        pos = len(out)
+        blobs = []
+        for i in range(count):
+            if i in self._edited:
+                blob = (self._edited[i] + "\x00").encode(self.encoding)
+            else:
+                blob = self.raw_text(i)
+            struct.pack_into(self.endian + "I", out, 4 + 4 * i, pos)
+            blobs.append(blob)
+            pos += len(blob)
+        out += b"".join(blobs)
+        return bytes(out)
+
+    def to_bytes(self) -> bytes:
+        """Serialize. TXT2 is rebuilt from (raw or edited) strings; other sections are copied as-is."""
+        parts = [b""]
+        for magic, view in self.sections:
+            body = self._build_txt2() if magic == b"TXT2" else view
+            parts.append(magic + struct.pack(self.endian + "I", len(body)) + b"\x00" * 8)
+            parts.append(body)
+            parts.append(SECTION_PAD * (-len(body) % SECTION_ALIGN))
+        size = HEADER_SIZE + sum(len(p) for p in parts)
+        header = bytearray(self.header)
+        struct.pack_into(self.endian + "I", header, 0x12, size)
+        parts[0] = bytes(header)
+        return b"".join(parts)
+
+
+# --- XMSBT -------------------------------------------------------------------
+#
+# xmsbt text is the raw TXT2 string: control codes are written as character
+# references (&#xE;, &#x2;, &#xFFFF; ...) and NUL as a literal "\\0". Those
+# references are not legal XML 1.0, so they are mapped to plane-15 private use
+# characters before the (streaming) parser sees them and mapped back after.
+
+CONTROL_BASE = 0xF0000
+_XML_ILLEGAL = [n for n in range(0x20) if n not in (0x09, 0x0A, 0x0D)] + [0xFFFE, 0xFFFF]
+_CONTROL_MAP = {n: chr(CONTROL_BASE + i) for i, n in enumerate(_XML_ILLEGAL)}
+_CONTROL_TABLE = {CONTROL_BASE + i: n for i, n in enumerate(_XML_ILLEGAL)}
+_CONTROL_REF = re.compile(r"&#x([0-9A-Fa-f]{1,4});")
+_CONTROL_CHARS = re.compile(f"[{chr(CONTROL_BASE)}-{chr(CONTROL_BASE + len(_XML_ILLEGAL) - 1)}]")
+
+
+def _control_sub(m: "re.Match") -> str:
+    return _CONTROL_MAP.get(int(m.group(1), 16), m.group(0))
+
+
+def _xml_safe(text: str) -> str:
+    if _CONTROL_CHARS.search(text):
+        raise MSBTError("xmsbt, kontrol kodları için ayrılan U+F00xx karakterlerini içeriyor")
+    return _CONTROL_REF.sub(_control_sub, text)
+
+
+def _keep_cr(text: str) -> str:
+    # XML turns every CR into LF. CRLF is the file's line ending, but any other
+    # CR is game text (e.g. "\r\n" inside a message is stored as "\r\r\n").
+    return text.replace("\r\n", "\n").replace("\r", "&#xD;")
+
+
+def _unescape(text: str) -> str:
+    return text.translate(_CONTROL_TABLE).replace("\\0", "\0")
+
+
+def read_xmsbt(path: Path) -> Iterator[Tuple[str, str]]:
+    """Yields (label, text) of an .xmsbt, parsing it in chunks."""
+    parser = ET.XMLPullParser(events=("end",))
+    text = ""
+
+    def entries():
+        nonlocal text
+        for _, el in parser.read_events():
+            if el.tag == "text":
+                text = el.text or ""
+            elif el.tag == "entry":
+                yield el.get("label"), _unescape(text)
+                text = ""
+                el.clear()
+
+    pending = ""
+    with open(path, encoding="utf-16", newline="") as f:
+        while True:
+            chunk = f.read(XMSBT_CHUNK)
+            if not chunk:
+                break
+            chunk = pending + chunk
+            pending = ""
+            # A trailing CR may be the first half of a CRLF
+            if chunk.endswith("\r"):
+                chunk, pending = chunk[:-1], "\r"
+            # Never split a character reference between two feeds
+            cut = chunk.rfind("&")
+            if cut != -1 and ";" not in chunk[cut:]:
+                chunk, pending = chunk[:cut], chunk[cut:] + pending
+            parser.feed(_xml_safe(_keep_cr(chunk)))
+            yield from entries()
+    parser.feed(_xml_safe(_keep_cr(pending)))
+    parser.close()
+    yield from entries()
+
+
+XMSBT_HEADER = '<?xml version="1.0" encoding="utf-16"?>'
+_XMSBT_ENTRY = re.compile(r'<entry label="([^"]*)">(\s*)(?:<text>(.*?)</text>|<text\s*/>)', re.S)
+
+
+def escape_xmsbt(text: str, newline: str = "\r\n") -> str:
+    """Inverse of the reader: XML escapes, control codes as &#xN;, CR as &#xD;, NUL as \\0."""
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#xD;")
+    if any(ord(c) in _CONTROL_MAP for c in text):
+        text = "".join("\\0" if c == "\0" else f"&#x{ord(c):X};" if ord(c) in _CONTROL_MAP else c
+                       for c in text)
+    return text.replace("\n", newline)
+
+
+def _xmsbt_entry(label: str, text: str, nl: str) -> str:
+    return f'\t<entry label="{label}">{nl}\t\t<text>{escape_xmsbt(text, nl)}</text>{nl}\t</entry>{nl}'
+
+
+def update_xmsbt(path: Path, updates: Dict[str, str], new_order: Optional[List[str]] = None) -> int:
+    """
+    Sets the texts of `updates` in an .xmsbt, editing only those <text>
+    elements so the rest of the file (newline style, declaration, hand
+    edits) is kept. Labels not in the file are appended, in `new_order` if
+    given; a missing file is created. Returns the number of entries changed.
+    """
+    path = Path(path)
+    if path.exists():
+        current = dict(read_xmsbt(path))
+        raw = path.read_bytes().decode("utf-16")
+    else:
+        current = {}
+        raw = f"{XMSBT_HEADER}\r\n<xmsbt>\r\n</xmsbt>"
+    pending = {label: text for label, text in updates.items() if current.get(label) != text}
+    if not pending:
+        return 0
+    changed = len(pending)
+    nl = "\r\n" if "\r\n" in raw[:200] else "\n"
+
+    def sub(m: "re.Match") -> str:
+        label = m.group(1)
+        if label not in pending:
+            return m.group(0)
+        return f'<entry label="{label}">{m.group(2)}<text>{escape_xmsbt(pending.pop(label), nl)}</text>'
+
+    raw = _XMSBT_ENTRY.sub(sub, raw)
+    if pending:
+        order = [l for l in (new_order or []) if l in pending]
+        order += [l for l in pending if l not in order]
+        end = raw.rfind("</xmsbt>")
+        raw = raw[:end] + "".join(_xmsbt_entry(l, pending[l], nl) for l in order) + raw[end:]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\xff\xfe" + raw.encode("utf-16-le"))
+    return changed
+
+
+def compile_xmsbt(xmsbt_path: Path, template_path: Path) -> Tuple[bytes, int, int, List[str]]:
+    """
+    Builds an MSBT from the template with every text replaced by the xmsbt's.
+    Returns (msbt bytes, texts set, template labels not in the xmsbt, unknown xmsbt labels).
+    """
+    msg = MSBT.from_file(template_path)
+    labels = msg.labels
+    seen = set()
+    unknown = []
+    for label, text in read_xmsbt(xmsbt_path):
+        if label not in labels:
+            unknown.append(label)
+            continue
+        msg[label] = text
+        seen.add(label)
+    return msg.to_bytes(), len(seen), len(labels) - len(seen), unknown
+
+
+def find_template(xmsbt_path: Path, template_dirs: List[Path]) -> Optional[Path]:
+    name = xmsbt_path.stem + ".msbt"
+    dirs = template_dirs or [xmsbt_path.parent / d for d in TEMPLATE_DIRS]
+    for d in dirs:
+        p = d / name
+        if p.is_file():
+            return p
+    return None
+
+
+def _file_sha1(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _load_cache(path: Path) -> Dict[str, Dict]:
+    """Returns {xmsbt relpath: entry}; a missing or broken cache is empty."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {e["source"]: e for e in data.get("files", [])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _save_cache(path: Path, entries: List[Dict]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": BUILD_CACHE_VERSION,
+        "files": sorted(entries, key=lambda e: e["source"]),
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _compile_job(item: Tuple[Path, Path, Path]) -> Tuple[Optional[str], int, int, List[str]]:
+    """Process pool unit: compile + write. Returns (error or None, set, missing, unknown)."""
+    xmsbt_path, template_path, out_path = item
+    try:
+        blob, n_set, n_missing, unknown = compile_xmsbt(xmsbt_path, template_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(blob)
+        return None, n_set, n_missing, unknown
+    except Exception as ex:
+        return f"{type(ex).__name__}: {ex}", 0, 0, []
+
+
+def cmd_compile(root: Path, template_dirs: List[Path], out_root: Optional[Path],
+                jobs: int, force: bool) -> int:
+    """
+    Compiles every .xmsbt under root to .msbt (next to it, or mirrored under
+    out_root). Files whose xmsbt and template are unchanged since the last
+    build (xmsbt_build.json in out_root or root) and whose output still exists
+    are skipped.
+    """
+    root = root.resolve()
+    if out_root:
+        out_root = out_root.resolve()
+    cache_path = (out_root or root) / BUILD_CACHE
+    prev = {} if force else _load_cache(cache_path)
+
+    todo = []
+    entries = []
+    skipped = 0
+    missing_template = 0
+    for x in sorted(root.rglob("*.xmsbt")):
+        rel = x.relative_to(root).as_posix()
+        template = find_template(x, template_dirs)
+        if template is None:
+            print(f"[!] Şablon .msbt yok: {rel}")
+            missing_template += 1
+            continue
+        out_path = (out_root / rel if out_root else x).with_suffix(".msbt")
+        if out_path.resolve() == template.resolve():
+            print(f"[!] Çıktı şablonun üzerine yazar, atlandı: {rel} (-o kullan)")
+            missing_template += 1
+            continue
+
+        entry = {"source": rel, "sha1": _file_sha1(x), "template": str(template),
+                 "template_sha1": _file_sha1(template), "output": str(out_path)}
+        old = prev.get(rel)
+        if old and out_path.is_file() and all(old.get(k) == entry[k] for k in entry):
+            entries.append(old)
+            skipped += 1
+            continue
+        todo.append((x, template, out_path, entry))
+
+    items = [t[:3] for t in todo]
+    if jobs > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as ex:
+            results = list(ex.map(_compile_job, items, chunksize=8))
+    else:
+        results = [_compile_job(i) for i in items]
+
+    failed = 0
+    for (x, _, _, entry), (err, n_set, n_missing, unknown) in zip(todo, results):
+        if err:
+            print(f"[X] {entry['source']}: {err}")
+            failed += 1
+            continue
+        if n_missing or unknown:
+            print(f"[!] {entry['source']}: {n_missing} etiket xmsbt'de yok (şablondaki metin kaldı), "
+                  f"{len(unknown)} bilinmeyen etiket{': ' + ', '.join(unknown[:5]) if unknown else ''}")
+        entries.append(entry)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    _save_cache(cache_path, entries)
+    print(f"[OK] Derlendi: {len(todo) - failed}, değişmedi (atlandı): {skipped}, "
+          f"hatalı: {failed}, şablonsuz: {missing_template}")
+    return 1 if failed else 0
+
+
+def iter_msbt(paths: List[Path]) -> Iterator[Path]:
+    for root in paths:
+        if root.is_file():
+            yield root
+        else:
+            yield from sorted(root.rglob("*.msbt"))
+
+
+def cmd_dump(path: Path) -> None:
+    msg = MSBT.from_file(path)
+    for label, text in msg.items():
+        print(f"[{label}]")
+        print(text)
+
+
+def cmd_verify(paths: List[Path]) -> int:
+    """Open every MSBT, read all labels/texts and check to_bytes() is byte-identical."""
+    files = list(iter_msbt(paths))
+    blobs = [p.read_bytes() for p in files]
+
+    t0 = time.perf_counter()
+    msgs = [MSBT(b) for b in blobs]
+    t_open = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    texts = sum(1 for m in msgs for _ in m.items())
+    t_read = time.perf_counter() - t0
+
+    bad = 0
+    t0 = time.perf_counter()
+    for p, b, m in zip(files, blobs, msgs):
+        if m.to_bytes() != b:
+            print(f"[X] Birebir değil: {p}")
+            bad += 1
+    t_write = time.perf_counter() - t0
+
+    print(f"[OK] {len(files)} MSBT, {texts} metin")
+    print(f"     açma: {t_open*1000:.1f} ms, tüm metinler: {t_read*1000:.1f} ms, yazma: {t_write*1000:.1f} ms")
+    print(f"[OK] Birebir: {len(files) - bad}, hatalı: {bad}")
+    return 1 if bad else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MSBT (MsgStdBn) reader/writer.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_d = sub.add_parser("dump", help="Print labels and texts of an MSBT.")
+    ap_d.add_argument("file", type=Path)
+
+    ap_v = sub.add_parser("verify", help="Parse + re-serialize MSBTs and check they are byte-identical.")
+    ap_v.add_argument("paths", nargs="+", type=Path, help="MSBT files or folders (recursive).")
+
+    ap_c = sub.add_parser("compile", help="Compile every .xmsbt under a folder to .msbt using matching .msbt templates.")
+    ap_c.add_argument("root", type=Path, help="Folder with translated .xmsbt files (recursive).")
+    ap_c.add_argument("-t", "--template", action="append", type=Path, default=[],
+                      help="Folder with template .msbt files, repeatable "
+                           "(default: ../en, ../all next to each .xmsbt).")
+    ap_c.add_argument("-o", "--output", type=Path,
+                      help="Output folder (mirrors root). Default: .msbt next to each .xmsbt.")
+    ap_c.add_argument("-j", "--jobs", type=int, default=0, help="Worker processes (0 = CPU count).")
+    ap_c.add_argument("--force", action="store_true", help="Rebuild everything, ignore xmsbt_build.json.")
+
+    args = ap.parse_args()
+    if args.cmd == "dump":
+        cmd_dump(args.file)
+    elif args.cmd == "verify":
+        sys.exit(cmd_verify(args.paths))
+    elif args.cmd == "compile":
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        sys.exit(cmd_compile(args.root, args.template, args.output, jobs, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,12 +21,20 @@ Notlar:
 import argparse
 import hashlib
 import json
+import mmap
 import os
+import re
+import shutil
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
 
 MAGIC = b"MsgStdBn"
+SCAN_BLOCK = 16 * 1024 * 1024  # hash + search granularity over the mapped file
+INDEX_JSON = "msbt_index.json"
+INDEX_DB = "msbt_index.sqlite"
 
 
 def sha1_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
@@ -89,6 +97,71 @@ def detect_endian_and_size(data: bytes, msbt_off: int) -> Optional[Tuple[str, in
     return None
 
 
+def detect_darc_size(data: bytes, off: int) -> Optional[Tuple[str, int]]:
+    """darc header: BOM at +0x04, total file size (u32) at +0x0C."""
+    if off + 0x1C > len(data):
+        return None
+    bom = data[off+4:off+6]
+    if bom == b"\xff\xfe":
+        endian = "little"
+    elif bom == b"\xfe\xff":
+        endian = "big"
+    else:
+        return None
+    size = read_u32(data, off + 0x0C, endian)
+    if 0x1C <= size <= len(data) - off:
+        return (endian, size)
+    return None
+
+
+def detect_sarc_size(data: bytes, off: int) -> Optional[Tuple[str, int]]:
+    """SARC header: BOM at +0x06, total file size (u32) at +0x08."""
+    if off + 0x14 > len(data):
+        return None
+    bom = data[off+6:off+8]
+    if bom == b"\xff\xfe":
+        endian = "little"
+    elif bom == b"\xfe\xff":
+        endian = "big"
+    else:
+        return None
+    size = read_u32(data, off + 0x08, endian)
+    if 0x14 <= size <= len(data) - off:
+        return (endian, size)
+    return None
+
+
+# kind -> (magic, extension, size detector). MSBP shares the MSBT header layout.
+SCAN_KINDS = {
+    "msbt": (MAGIC, ".msbt", detect_endian_and_size),
+    "msbp": (b"MsgPrjBn", ".msbp", detect_endian_and_size),
+    "darc": (b"darc", ".darc", detect_darc_size),
+    "sarc": (b"SARC", ".sarc", detect_sarc_size),
+}
+
+
+def scan_mapped(buf, magics: List[bytes]) -> Tuple[str, Dict[bytes, List[int]]]:
+    """
+    One pass over a mapped file: each SCAN_BLOCK is fed to SHA1 and searched
+    for all magics (one regex alternation) while it is hot in the page cache.
+    Returns (sha1 hex, {magic: offsets}).
+    """
+    h = hashlib.sha1()
+    found: Dict[bytes, List[int]] = {m: [] for m in magics}
+    pattern = re.compile(b"|".join(re.escape(m) for m in magics))
+    longest = max(len(m) for m in magics)
+    size = len(buf)
+    with memoryview(buf) as mv:
+        for start in range(0, size, SCAN_BLOCK):
+            end = min(start + SCAN_BLOCK, size)
+            h.update(mv[start:end])
+            # matches must start in this block but may end in the next one
+            for m in pattern.finditer(buf, start, min(end + longest - 1, size)):
+                if m.start() < end:
+                    found[m.group()].append(m.start())
+    return h.hexdigest(), found
+
+
 def safe_relpath(path: Path, root: Path) -> str:
     return str(path.relative_to(root)).replace("\\", "/")
 
@@ -97,115 +170,521 @@ def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def extract_msbt_from_file(src_path: Path, in_root: Path, out_root: Path) -> List[Dict]:
+def locate_blocks(data, kinds: Tuple[str, ...]) -> Tuple[str, List[Tuple[str, int, int, str, int]]]:
+    """
+    Hash + locate embedded blocks in a mapped file.
+    Returns (sha1, [(kind, index, offset, endian, size)]).
+    """
+    file_sha1, found = scan_mapped(data, [SCAN_KINDS[k][0] for k in kinds])
+    blocks = []
+    for kind in kinds:
+        magic, _, detect = SCAN_KINDS[kind]
+        for i, off in enumerate(found[magic]):
+            det = detect(data, off)
+            if not det:
+                continue
+            endian, size = det
+            if off + size > len(data):
+                continue
+            blocks.append((kind, i, off, endian, size))
+    return file_sha1, blocks
+
+
+def scan_file(src_path: Path, kinds: Tuple[str, ...] = ("msbt",)) -> Tuple[str, List[Tuple[str, int, int, str, int]]]:
+    """locate_blocks() for a path; this is the process-pool work unit."""
+    if src_path.stat().st_size == 0:
+        return "", []
+    with src_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return locate_blocks(data, kinds)
+
+
+def write_blocks(src_path: Path, in_root: Path, out_root: Path, file_sha1: str,
+                 blocks: List[Tuple[str, int, int, str, int]], data=None) -> List[Dict]:
     """
-    Extract all MSBT blocks embedded in a file.
+    Write located blocks out as files, straight from the mapping (zero-copy
+    memoryview slices). Maps src_path itself unless `data` is given.
     Returns list of index entries.
     """
     entries = []
-    data = src_path.read_bytes()
-    offsets = find_all_magic_positions(data, MAGIC)
-    if not offsets:
+    if not blocks:
         return entries
+    if data is None:
+        with src_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return write_blocks(src_path, in_root, out_root, file_sha1, blocks, mapped)
 
     rel = safe_relpath(src_path, in_root)
     base_out_dir = out_root / rel
-    # We store extracted msbt files next to a virtual folder named "__msbt__"
-    out_dir = base_out_dir.parent / "__msbt__"
-    ensure_dir(out_dir)
 
-    file_sha1 = sha1_file(src_path)
+    with memoryview(data) as mv:
+        for kind, i, off, endian, size in blocks:
+            # We store extracted blocks next to a virtual folder named "__msbt__" (or "__darc__" ...)
+            out_dir = base_out_dir.parent / f"__{kind}__"
+            ensure_dir(out_dir)
+
+            # Output name: originalfilename__<index>__0xOFFSET.msbt
+            out_name = f"{src_path.name}__{i:02d}__0x{off:08X}{SCAN_KINDS[kind][1]}"
+            out_path = out_dir / out_name
+            blob = mv[off:off+size]
+            out_path.write_bytes(blob)
+
+            entry = {
+                "source_relpath": rel,
+                "source_sha1": file_sha1,
+                "msbt_index": i,
+                "msbt_offset": off,
+                "msbt_size": size,
+                "endian_guess": endian,
+                "extracted_relpath": safe_relpath(out_path, out_root),
+                "extracted_sha1": hashlib.sha1(blob).hexdigest(),
+            }
+            if kind != "msbt":
+                entry["kind"] = kind
+            entries.append(entry)
+
+    return entries
 
-    for i, off in enumerate(offsets):
-        det = detect_endian_and_size(data, off)
-        if not det:
-            continue
-        endian, size = det
-        end = off + size
-        if end > len(data):
-            continue
 
-        msbt_blob = data[off:end]
+def extract_msbt_from_file(src_path: Path, in_root: Path, out_root: Path,
+                           kinds: Tuple[str, ...] = ("msbt",)) -> List[Dict]:
+    """
+    Extract all MSBT blocks (or the other `kinds` in SCAN_KINDS) embedded in
+    a file. The file is memory-mapped, hashed and searched in one pass and
+    blobs are written straight from the mapping.
+    Returns list of index entries.
+    """
+    if src_path.stat().st_size == 0:
+        return []
+    with src_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        file_sha1, blocks = locate_blocks(data, kinds)
+        return write_blocks(src_path, in_root, out_root, file_sha1, blocks, data)
 
-        # Output name: originalfilename__<index>__0xOFFSET.msbt
-        out_name = f"{src_path.name}__{i:02d}__0x{off:08X}.msbt"
-        out_path = out_dir / out_name
-        out_path.write_bytes(msbt_blob)
 
-        entries.append({
-            "source_relpath": rel,
-            "source_sha1": file_sha1,
-            "msbt_index": i,
-            "msbt_offset": off,
-            "msbt_size": size,
-            "endian_guess": endian,
-            "extracted_relpath": safe_relpath(out_path, out_root),
-        })
+def entry_sort_key(entry: Dict) -> Tuple[str, int, int]:
+    """Index order: source path, then block kind, then position in the source."""
+    return (entry["source_relpath"], list(SCAN_KINDS).index(entry.get("kind", "msbt")), entry["msbt_index"])
 
-    return entries
+
+def iter_files(root: Path):
+    for p in root.rglob("*"):
+        if p.is_file():
+            yield p
+
+
+def extract_parallel(in_dir: Path, out_dir: Path, kinds: Tuple[str, ...], jobs: int) -> Tuple[int, List[Dict]]:
+    """
+    Scanning (mmap + SHA1 + search) runs in a process pool and is submitted
+    while the tree is still being walked; blob writing runs in a thread pool
+    so it overlaps with the scans still in flight.
+    Returns (scanned file count, entries in no particular order).
+    """
+    scanned = 0
+    all_entries: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=jobs) as procs, ThreadPoolExecutor(max_workers=jobs) as threads:
+        scans = {}
+        for p in iter_files(in_dir):
+            scanned += 1
+            scans[procs.submit(scan_file, p, kinds)] = p
+
+        writes = []
+        for fut in as_completed(scans):
+            p = scans[fut]
+            try:
+                file_sha1, blocks = fut.result()
+            except Exception as e:
+                print(f"[!] Hata (extract) {p}: {e}")
+                continue
+            if blocks:
+                writes.append((p, threads.submit(write_blocks, p, in_dir, out_dir, file_sha1, blocks)))
+
+        for p, fut in writes:
+            try:
+                all_entries.extend(fut.result())
+            except Exception as e:
+                print(f"[!] Hata (extract) {p}: {e}")
+    return scanned, all_entries
+
+
+def write_index(index_path: Path, idx: Dict) -> None:
+    index_path.write_text(json.dumps(idx, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# Entry fields in JSON order; "kind" is NULL for msbt, like it is absent in JSON.
+# "extracted_sha1" is NULL for indexes written before it existed.
+ENTRY_FIELDS = ("source_relpath", "source_sha1", "msbt_index", "msbt_offset",
+                "msbt_size", "endian_guess", "extracted_relpath", "extracted_sha1", "kind")
+
+
+class IndexDB:
+    """
+    SQLite form of msbt_index.json: one row per entry, indexed by source path,
+    source sha1 and extracted path, so tools only load the entries they need.
+    Header fields (input_root, ...) live in the `meta` table.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                source_relpath TEXT NOT NULL,
+                source_sha1 TEXT NOT NULL,
+                msbt_index INTEGER NOT NULL,
+                msbt_offset INTEGER NOT NULL,
+                msbt_size INTEGER NOT NULL,
+                endian_guess TEXT,
+                extracted_relpath TEXT NOT NULL UNIQUE,
+                extracted_sha1 TEXT,
+                kind TEXT
+            );
+            CREATE INDEX IF NOT EXISTS entries_source ON entries (source_relpath);
+            CREATE INDEX IF NOT EXISTS entries_sha1 ON entries (source_sha1);
+        """)
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(entries)")}
+        if "extracted_sha1" not in columns:
+            self.conn.execute("ALTER TABLE entries ADD COLUMN extracted_sha1 TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    @staticmethod
+    def _entry(row) -> Dict:
+        entry = dict(zip(ENTRY_FIELDS, row))
+        for field in ("extracted_sha1", "kind"):
+            if entry[field] is None:
+                del entry[field]
+        return entry
+
+    def _select(self, where: str = "", args: Tuple = ()) -> List[Dict]:
+        sql = f"SELECT {', '.join(ENTRY_FIELDS)} FROM entries {where} ORDER BY id"
+        return [self._entry(r) for r in self.conn.execute(sql, args)]
+
+    def write(self, idx: Dict) -> None:
+        """Replace the whole index with a JSON-shaped dict."""
+        with self.conn:
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("DELETE FROM entries")
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                                  [(k, json.dumps(v)) for k, v in idx.items() if k != "entries"])
+            self.conn.executemany(
+                f"INSERT INTO entries ({', '.join(ENTRY_FIELDS)}) VALUES ({', '.join('?' * len(ENTRY_FIELDS))})",
+                [tuple(e.get(f) for f in ENTRY_FIELDS) for e in idx.get("entries", [])])
+
+    def read(self) -> Dict:
+        """Whole index as the JSON-shaped dict."""
+        idx = {k: json.loads(v) for k, v in self.conn.execute("SELECT key, value FROM meta")}
+        idx["entries"] = self._select()
+        return idx
+
+    def sources(self) -> List[str]:
+        """Source paths, in index order."""
+        rows = self.conn.execute("SELECT source_relpath FROM entries GROUP BY source_relpath ORDER BY MIN(id)")
+        return [r[0] for r in rows]
+
+    def by_source(self, source_relpath: str) -> List[Dict]:
+        return self._select("WHERE source_relpath = ?", (source_relpath,))
+
+    def by_sha1(self, source_sha1: str) -> List[Dict]:
+        return self._select("WHERE source_sha1 = ?", (source_sha1,))
+
+    def by_extracted(self, extracted_relpath: str) -> Optional[Dict]:
+        rows = self._select("WHERE extracted_relpath = ?", (extracted_relpath,))
+        return rows[0] if rows else None
+
+    def update(self, entries: List[Dict]) -> None:
+        """Store changed offset/size/sha1s of existing entries (after a restore)."""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE entries SET source_sha1 = ?, msbt_offset = ?, msbt_size = ?, extracted_sha1 = ? "
+                "WHERE extracted_relpath = ?",
+                [(e["source_sha1"], e["msbt_offset"], e["msbt_size"], e.get("extracted_sha1"), e["extracted_relpath"])
+                 for e in entries])
+
+
+def find_index(out_dir: Path, fmt: str = "auto") -> Path:
+    """Index file to use: `fmt` json/sqlite, or for auto the newer of the two."""
+    candidates = {"json": out_dir / INDEX_JSON, "sqlite": out_dir / INDEX_DB}
+    if fmt != "auto":
+        return candidates[fmt]
+    existing = [p for p in candidates.values() if p.exists()]
+    if not existing:
+        return candidates["json"]
+    return max(existing, key=lambda p: p.stat().st_mtime)
+
+
+def save_index(index_path: Path, idx: Dict) -> None:
+    if index_path.suffix == ".sqlite":
+        with IndexDB(index_path) as db:
+            db.write(idx)
+    else:
+        write_index(index_path, idx)
+
+
+def load_index(index_path: Path) -> Dict:
+    if index_path.suffix == ".sqlite":
+        with IndexDB(index_path) as db:
+            return db.read()
+    return json.loads(index_path.read_text(encoding="utf-8"))
+
+
+def cmd_index(out_dir: Path, to: str) -> None:
+    """Convert msbt_index.json <-> msbt_index.sqlite."""
+    out_dir = out_dir.resolve()
+    src = out_dir / (INDEX_DB if to == "json" else INDEX_JSON)
+    dst = out_dir / (INDEX_JSON if to == "json" else INDEX_DB)
+    if not src.exists():
+        raise FileNotFoundError(f"Index bulunamadı: {src}")
+    idx = load_index(src)
+    save_index(dst, idx)
+    print(f"[OK] {src.name} -> {dst.name} ({len(idx.get('entries', []))} kayıt)")
 
 
-def cmd_extract(in_dir: Path, out_dir: Path) -> None:
+def cmd_extract(in_dir: Path, out_dir: Path, kinds: Tuple[str, ...] = ("msbt",), jobs: int = 1,
+                index_format: str = "json") -> None:
     in_dir = in_dir.resolve()
     out_dir = out_dir.resolve()
     ensure_dir(out_dir)
 
     all_entries = []
     scanned = 0
-    extracted_files = 0
 
-    for p in in_dir.rglob("*"):
-        if not p.is_file():
-            continue
-        scanned += 1
-        try:
-            entries = extract_msbt_from_file(p, in_dir, out_dir)
-            if entries:
-                all_entries.extend(entries)
-                extracted_files += len(entries)
-        except Exception as e:
-            print(f"[!] Hata (extract) {p}: {e}")
-
-    index_path = out_dir / "msbt_index.json"
-    index_path.write_text(json.dumps({
+    if jobs > 1:
+        scanned, all_entries = extract_parallel(in_dir, out_dir, kinds, jobs)
+    else:
+        for p in iter_files(in_dir):
+            scanned += 1
+            try:
+                all_entries.extend(extract_msbt_from_file(p, in_dir, out_dir, kinds))
+            except Exception as e:
+                print(f"[!] Hata (extract) {p}: {e}")
+
+    # Same order whatever the walk / completion order was
+    all_entries.sort(key=entry_sort_key)
+    extracted_files = len(all_entries)
+
+    index_path = find_index(out_dir, index_format)
+    save_index(index_path, {
         "input_root": str(in_dir),
         "output_root": str(out_dir),
         "total_scanned_files": scanned,
         "total_msbt_extracted": extracted_files,
         "entries": all_entries
-    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    })
 
     print(f"[OK] Tarandı: {scanned} dosya")
     print(f"[OK] Çıkarılan MSBT: {extracted_files}")
     print(f"[OK] Index: {index_path}")
 
 
-def restore_one_entry(entry: Dict, in_root: Path, out_root: Path) -> bool:
+DARC_ALIGN = 0x80  # data alignment used by the game's darc files
+
+
+def darc_files(data, base: int = 0) -> Optional[Tuple[str, List[Tuple[int, int, int]]]]:
     """
-    Restore a single MSBT entry back into its source file in-place.
+    darc at `base`: node table at header+0x10, 12-byte nodes (name offset with
+    dir flag in bit 24, data offset, size); the root node's size is the node count.
+    Returns (endian, [(node_pos, abs_offset, size)]) for file nodes, None if not a darc.
+    """
+    if data[base:base+4] != b"darc":
+        return None
+    det = detect_darc_size(data, base)
+    if det is None:
+        return None
+    endian = det[0]
+    table = base + read_u32(data, base + 0x10, endian)
+    count = read_u32(data, table + 8, endian)
+    files = []
+    for n in range(count):
+        pos = table + n * 12
+        if read_u32(data, pos, endian) & 0x01000000:
+            continue
+        files.append((pos, base + read_u32(data, pos + 4, endian), read_u32(data, pos + 8, endian)))
+    return endian, files
+
+
+def rebuild_darc(data, base: int, patches: Dict[int, bytes]):
+    """
+    Rebuild the darc at `base` with files replaced by `patches` ({absolute
+    offset: new bytes}). Patches inside nested darcs rebuild those first.
+    Following files are shifted by the growth rounded up to DARC_ALIGN, so
+    their alignment is kept; offsets, sizes and the header file size are fixed up.
+
+    Returns (new_bytes, spans) where spans are (old_start, old_end, new_start)
+    for every copied region, new_start relative to the new darc. None if a
+    patch does not land on a darc file.
+    """
+    parsed = darc_files(data, base)
+    if parsed is None:
+        return None
+    endian, files = parsed
+    darc_size = read_u32(data, base + 0x0C, endian)
+    end = base + darc_size
+
+    # Files may share data; handle every distinct region once, in offset order
+    regions = sorted({(off, size) for _, off, size in files})
+    if not regions:
+        return None
+    remaining = dict(patches)
+
+    out = bytearray(data[base:regions[0][0]])
+    spans = [(base, regions[0][0], 0)]
+    moved: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    prev_end = regions[0][0]
+
+    for off, size in regions:
+        if off < prev_end:  # overlapping files cannot be moved independently
+            return None
+        gap = data[prev_end:off]
+        spans.append((prev_end, off, len(out)))
+        out += gap
+        new_off = len(out)  # relative to the new darc
+        inner = {k: v for k, v in remaining.items() if off <= k < off + size}
+        if off in inner and len(inner) == 1:
+            blob = inner.pop(off)
+            remaining.pop(off)
+            out += blob
+            new_size = len(blob)
+            spans.append((off, off + size, new_off))
+        elif inner:
+            child = rebuild_darc(data, off, inner)
+            if child is None:
+                return None
+            blob, child_spans = child
+            for k in inner:
+                remaining.pop(k)
+            out += blob
+            new_size = len(blob)
+            spans.extend((a, b, new_off + rel) for a, b, rel in child_spans)
+        else:
+            out += data[off:off+size]
+            new_size = size
+            spans.append((off, off + size, new_off))
+        if new_size <= size:
+            # Fits the old slot: pad it and keep the node size as it was
+            out += b"\x00" * (size - new_size)
+            new_size = size
+        else:
+            out += b"\x00" * (-(new_size - size) % DARC_ALIGN)
+        moved[(off, size)] = (new_off, new_size)
+        prev_end = off + size
+
+    if remaining:
+        return None
+
+    spans.append((prev_end, end, len(out)))
+    out += data[prev_end:end]
+
+    for pos, off, size in files:
+        new_off, new_size = moved[(off, size)]
+        rel_pos = pos - base
+        out[rel_pos+4:rel_pos+8] = new_off.to_bytes(4, endian)
+        out[rel_pos+8:rel_pos+12] = new_size.to_bytes(4, endian)
+    out[0x0C:0x10] = len(out).to_bytes(4, endian)
+    return out, spans
+
+
+def relocate(spans: List[Tuple[int, int, int]], off: int) -> int:
+    """Map an offset in the old file to the rebuilt one."""
+    for start, stop, new_start in spans:
+        if start <= off < stop:
+            return new_start + (off - start)
+    return off
+
+
+def encloses_other(entry: Dict, group: List[Dict]) -> bool:
+    """Whether another entry of the same source lies inside `entry`'s bytes."""
+    start = int(entry["msbt_offset"])
+    end = start + int(entry["msbt_size"])
+    return any(e is not entry and start <= int(e["msbt_offset"]) and int(e["msbt_offset"]) + int(e["msbt_size"]) <= end
+               for e in group)
+
+
+def overlaps(claimed: List[Tuple[int, int]], start: int, end: int) -> bool:
+    return any(start < c_end and c_start < end for c_start, c_end in claimed)
+
+
+def plan_entry(data, entry: Dict, blob: bytes, group: List[Dict], claimed: List[Tuple[int, int]],
+               src_path: Path) -> Optional[bool]:
+    """
+    Whether an extracted blob has to be written: True to write it, False to
+    leave the slot alone, None on a conflicting edit.
+
+    A blob is written when it differs from the bytes now in the source, so
+    restoring into a fresh copy of the source patches it again. A container
+    blob (darc/sarc) goes stale once an entry inside it is restored, so it is
+    only written when it was edited since extract (sha1 differs from
+    extracted_sha1). Edited entries claim their range in `claimed`; writing
+    into a claimed range is a conflict, so an edited MSBT wins over its darc.
+    """
+    off = int(entry["msbt_offset"])
+    size = int(entry["msbt_size"])
+    name = Path(entry["extracted_relpath"]).name
+    stored = entry.get("extracted_sha1")
+    edited = None if stored is None else hashlib.sha1(blob).hexdigest() != stored
+
+    write = blob.ljust(size, b"\x00") != data[off:off+size]
+    if write and entry.get("kind", "msbt") != "msbt":
+        if edited is None and encloses_other(entry, group):
+            print(f"[!] UYARI: {name} eski bir index'ten, düzenlenip düzenlenmediği bilinmiyor; "
+                  f"içindeki girdileri ezmemek için atlandı (yeniden extract et): {src_path}")
+            return False
+        if edited is False:
+            return False
+
+    if write and overlaps(claimed, off, off + size):
+        print(f"[X] Çakışan düzenleme: {name} başka bir düzenlenmiş girdiyle aynı baytları değiştiriyor "
+              f"(0x{off:X}-0x{off+size:X}): {src_path}")
+        return None
+    if write or edited:
+        claimed.append((off, off + size))
+    return write
+
+
+def nested_first(entries: List[Dict]) -> List[Dict]:
+    """Smallest blobs first, so an edited MSBT claims its bytes before an enclosing darc."""
+    return sorted(entries, key=lambda e: int(e["msbt_size"]))
+
+
+def patch_entry(data: bytearray, entry: Dict, src_path: Path, out_root: Path,
+                group: Optional[List[Dict]] = None,
+                claimed: Optional[List[Tuple[int, int]]] = None) -> bool:
+    """
+    Patch a single MSBT entry into an already loaded source file (in memory).
     Uses extracted_relpath from OUT_FOLDER.
+    `group` is every entry of the source and `claimed` the ranges of edited
+    entries seen so far (see plan_entry); a blob equal to the source is left alone.
     """
-    src_path = in_root / entry["source_relpath"]
     msbt_path = out_root / entry["extracted_relpath"]
-
-    if not src_path.exists():
-        print(f"[!] Source yok: {src_path}")
-        return False
     if not msbt_path.exists():
         print(f"[!] MSBT yok: {msbt_path}")
         return False
 
-    # Integrity check (optional): warn if source changed
-    current_sha1 = sha1_file(src_path)
-    if current_sha1 != entry["source_sha1"]:
-        print(f"[!] UYARI: Source değişmiş görünüyor (sha1 farklı): {src_path}")
-
-    data = bytearray(src_path.read_bytes())
     off = int(entry["msbt_offset"])
     orig_size = int(entry["msbt_size"])
 
+    # Safety: check original magic still there
+    magic = SCAN_KINDS[entry.get("kind", "msbt")][0]
+    if data[off:off+len(magic)] != magic:
+        print(f"[!] UYARI: Orijinal offsette {magic.decode()} yok (offset kaymış olabilir): {src_path}")
+        # Still write if user wants; but safer to stop:
+        return False
+
     new_blob = msbt_path.read_bytes()
 
+    write = plan_entry(data, entry, new_blob, group or [entry], [] if claimed is None else claimed, src_path)
+    if write is None:
+        return False
+    if not write:
+        return True
+
     if len(new_blob) > orig_size:
         print(f"[X] Boyut büyümüş! {msbt_path.name} ({len(new_blob)}) > original ({orig_size})")
         return False
@@ -214,43 +693,206 @@ def restore_one_entry(entry: Dict, in_root: Path, out_root: Path) -> bool:
     if len(new_blob) < orig_size:
         new_blob += b"\x00" * (orig_size - len(new_blob))
 
-    # Safety: check original magic still there
-    if data[off:off+8] != MAGIC:
-        print(f"[!] UYARI: Orijinal offsette MsgStdBn yok (offset kaymış olabilir): {src_path}")
-        # Still write if user wants; but safer to stop:
-        return False
-
     data[off:off+orig_size] = new_blob
-    src_path.write_bytes(data)
     return True
 
 
-def cmd_restore(in_dir: Path, out_dir: Path) -> None:
-    in_dir = in_dir.resolve()
-    out_dir = out_dir.resolve()
-
-    index_path = out_dir / "msbt_index.json"
-    if not index_path.exists():
-        raise FileNotFoundError(f"Index bulunamadı: {index_path}")
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write via a temp file + rename, so a crash never leaves a half-written file."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    shutil.copymode(path, tmp)
+    os.replace(tmp, path)
 
-    idx = json.loads(index_path.read_text(encoding="utf-8"))
-    entries = idx.get("entries", [])
 
+def repack_source(src_path: Path, data: bytearray, entries: List[Dict], out_root: Path) -> Tuple[int, int, bool, bool]:
+    """
+    Restore path for containers where an MSBT grew: rebuild the (nested) darc
+    with every edited MSBT and update the entries' offsets/sizes/sha1 in place.
+    Returns (ok, fail, rebuilt, index_changed).
+    """
+    patches: Dict[int, bytes] = {}
+    patched: List[Tuple[Dict, int]] = []
+    claimed: List[Tuple[int, int]] = []
     ok = 0
     fail = 0
+    for e in nested_first(entries):
+        msbt_path = out_root / e["extracted_relpath"]
+        if not msbt_path.exists():
+            print(f"[!] MSBT yok: {msbt_path}")
+            fail += 1
+            continue
+        off = int(e["msbt_offset"])
+        magic = SCAN_KINDS[e.get("kind", "msbt")][0]
+        if data[off:off+len(magic)] != magic:
+            print(f"[!] UYARI: Orijinal offsette {magic.decode()} yok (offset kaymış olabilir): {src_path}")
+            fail += 1
+            continue
+        blob = msbt_path.read_bytes()
+        write = plan_entry(data, e, blob, entries, claimed, src_path)
+        if write is None:
+            fail += 1
+            continue
+        if not write:
+            ok += 1
+            continue
+        patches[off] = blob
+        patched.append((e, len(blob)))
+
+    if not patches:
+        return ok, fail, False, False
+
+    rebuilt = rebuild_darc(data, 0, patches)
+    if rebuilt is None:
+        print(f"[X] Yeniden paketlenemedi (darc değil ya da MSBT bir darc dosyasına denk gelmiyor): {src_path}")
+        return 0, len(entries), False, False
+
+    new_data, spans = rebuilt
+    darc_end = read_u32(data, 0x0C, detect_darc_size(data, 0)[0])
+    spans.append((darc_end, len(data), len(new_data)))
+    new_data += data[darc_end:]
+    atomic_write(src_path, new_data)
+
+    # The index now describes the rebuilt file
+    new_sha1 = hashlib.sha1(new_data).hexdigest()
     for e in entries:
+        off = int(e["msbt_offset"])
+        last = off + int(e["msbt_size"]) - 1
+        e["msbt_offset"] = relocate(spans, off)
+        e["msbt_size"] = relocate(spans, last) + 1 - e["msbt_offset"]
+        e["source_sha1"] = new_sha1
+    for e, size in patched:
+        e["msbt_size"] = size
+
+    print(f"[OK] Yeniden paketlendi: {src_path} ({len(data)} -> {len(new_data)} byte)")
+    return ok + len(patched), fail, True, True
+
+
+def restore_source(src_relpath: str, entries: List[Dict], in_root: Path, out_root: Path,
+                   repack: bool = False) -> Tuple[int, int, bool, bool]:
+    """
+    Restore every entry of one source file: the file is read and hashed once,
+    all MSBTs are patched in memory and it is written back once.
+    With `repack`, a grown MSBT rebuilds the container instead of failing;
+    if everything fits it is still patched in place.
+    Returns (ok, fail, rebuilt, index_changed); index_changed means offsets,
+    sizes or source_sha1 of the entries were updated.
+    """
+    src_path = in_root / src_relpath
+    if not src_path.exists():
+        print(f"[!] Source yok: {src_path}")
+        return 0, len(entries), False, False
+
+    data = bytearray(src_path.read_bytes())
+
+    # Integrity check (optional): warn if source changed
+    current_sha1 = hashlib.sha1(data).hexdigest()
+    if any(current_sha1 != e["source_sha1"] for e in entries):
+        print(f"[!] UYARI: Source değişmiş görünüyor (sha1 farklı): {src_path}")
+
+    if repack:
+        for e in entries:
+            msbt_path = out_root / e["extracted_relpath"]
+            if msbt_path.exists() and msbt_path.stat().st_size > int(e["msbt_size"]):
+                return repack_source(src_path, data, entries, out_root)
+
+    claimed: List[Tuple[int, int]] = []
+    ok = 0
+    fail = 0
+    for e in nested_first(entries):
         try:
-            if restore_one_entry(e, in_dir, out_dir):
+            if patch_entry(data, e, src_path, out_root, entries, claimed):
                 ok += 1
             else:
                 fail += 1
         except Exception as ex:
-            print(f"[!] Hata (restore) {e.get('source_relpath')}: {ex}")
+            print(f"[!] Hata (restore) {src_relpath}: {ex}")
             fail += 1
 
+    new_sha1 = hashlib.sha1(data).hexdigest()
+    if new_sha1 == current_sha1:
+        return ok, fail, False, False
+    atomic_write(src_path, data)
+    for e in entries:
+        e["source_sha1"] = new_sha1
+    return ok, fail, False, True
+
+
+def restore_one_entry(entry: Dict, in_root: Path, out_root: Path) -> bool:
+    """
+    Restore a single MSBT entry back into its source file in-place.
+    Uses extracted_relpath from OUT_FOLDER.
+    """
+    ok, _, _, _ = restore_source(entry["source_relpath"], [entry], in_root, out_root)
+    return ok == 1
+
+
+def group_by_source(entries: List[Dict]) -> Dict[str, List[Dict]]:
+    """{source_relpath: entries}, in first-seen order."""
+    groups: Dict[str, List[Dict]] = {}
+    for e in entries:
+        groups.setdefault(e["source_relpath"], []).append(e)
+    return groups
+
+
+def cmd_restore(in_dir: Path, out_dir: Path, repack: bool = False,
+                index_format: str = "auto", sources: Optional[List[str]] = None) -> None:
+    in_dir = in_dir.resolve()
+    out_dir = out_dir.resolve()
+
+    index_path = find_index(out_dir, index_format)
+    if not index_path.exists():
+        raise FileNotFoundError(f"Index bulunamadı: {index_path}")
+
+    db = None
+    if index_path.suffix == ".sqlite":
+        # Only the entries of the sources being restored are loaded
+        db = IndexDB(index_path)
+        groups = ((rel, db.by_source(rel)) for rel in (sources or db.sources()))
+    else:
+        idx = json.loads(index_path.read_text(encoding="utf-8"))
+        grouped = group_by_source(idx.get("entries", []))
+        groups = ((rel, grouped.get(rel, [])) for rel in (sources or grouped))
+
+    ok = 0
+    fail = 0
+    rebuilt = 0
+    changed = False
+    try:
+        for src_relpath, group in groups:
+            if not group:
+                print(f"[!] Index'te yok: {src_relpath}")
+                continue
+            try:
+                g_ok, g_fail, g_rebuilt, g_changed = restore_source(src_relpath, group, in_dir, out_dir, repack)
+                ok += g_ok
+                fail += g_fail
+                if g_rebuilt:
+                    rebuilt += 1
+                if g_changed:
+                    changed = True
+                    if db is not None:
+                        db.update(group)
+            except Exception as ex:
+                print(f"[!] Hata (restore) {src_relpath}: {ex}")
+                fail += len(group)
+    finally:
+        if db is not None:
+            db.close()
+
+    if changed and db is None:
+        # Offsets/sizes/sha1s changed: keep the index in sync with the sources
+        write_index(index_path, idx)
+    if rebuilt:
+        print(f"[OK] Yeniden paketlenen kaynak: {rebuilt} (index güncellendi)")
+
     print(f"[OK] Restore başarılı: {ok}")
     print(f"[OK] Restore başarısız: {fail}")
-    print("Not: Eğer 'Boyut büyümüş' hatası alırsan, çeviride metni kısalt veya MSBT yapısını yeniden paketleyebilen bir editör kullan.")
+    if not repack:
+        print("Not: Eğer 'Boyut büyümüş' hatası alırsan, çeviride metni kısalt veya --repack ile darc'ı yeniden paketle.")
 
 
 def main():
@@ -260,19 +902,39 @@ def main():
     ap_e = sub.add_parser("extract", help="Scan folder recursively, extract embedded MSBT blocks.")
     ap_e.add_argument("-i", "--input", required=True, help="Input folder (original extracted game files).")
     ap_e.add_argument("-o", "--output", required=True, help="Output folder for extracted MSBTs + index.")
+    ap_e.add_argument("--kind", action="append", choices=list(SCAN_KINDS),
+                      help="Block type to extract, repeatable (default: msbt). All are found in one pass.")
+    ap_e.add_argument("-j", "--jobs", type=int, default=1,
+                      help="Parallel workers (0 = CPU count). Index output is identical to -j 1.")
+    ap_e.add_argument("--index", choices=["json", "sqlite"], default="json",
+                      help="Index format: msbt_index.json (default) or msbt_index.sqlite.")
 
     ap_r = sub.add_parser("restore", help="Restore edited MSBTs back into original files using index.")
     ap_r.add_argument("-i", "--input", required=True, help="Input folder (same as original input).")
-    ap_r.add_argument("-o", "--output", required=True, help="Output folder where msbt_index.json exists.")
+    ap_r.add_argument("-o", "--output", required=True, help="Output folder where msbt_index.json/.sqlite exists.")
+    ap_r.add_argument("--index", choices=["auto", "json", "sqlite"], default="auto",
+                      help="Index to read (auto: the newer of msbt_index.json / msbt_index.sqlite).")
+    ap_r.add_argument("--source", action="append",
+                      help="Only restore this source_relpath (repeatable).")
+    ap_r.add_argument("--repack", action="store_true",
+                      help="Rebuild the enclosing darc when an MSBT grew (updates the index). Fitting MSBTs are still patched in place.")
+
+    ap_x = sub.add_parser("index", help="Convert the index between JSON and SQLite.")
+    ap_x.add_argument("-o", "--output", required=True, help="Output folder where the index exists.")
+    ap_x.add_argument("--to", choices=["json", "sqlite"], required=True, help="Target format.")
 
     args = ap.parse_args()
-    in_dir = Path(args.input)
     out_dir = Path(args.output)
+    if args.cmd == "index":
+        cmd_index(out_dir, args.to)
+        return
+    in_dir = Path(args.input)
 
     if args.cmd == "extract":
-        cmd_extract(in_dir, out_dir)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        cmd_extract(in_dir, out_dir, tuple(dict.fromkeys(args.kind or ["msbt"])), jobs, args.index)
     elif args.cmd == "restore":
-        cmd_restore(in_dir, out_dir)
+        cmd_restore(in_dir, out_dir, args.repack, args.index, args.source)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,30 @@
 import os
+import sys
+import csv
+import json
+import sqlite3
+import fnmatch
+import argparse
 import hashlib
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def sha256_hash(file_path: Path, chunk_size=1024 * 1024) -> str:
-    """Dosyanın SHA-256 hash'ini hesaplar (parça parça okur)."""
-    h = hashlib.sha256()
+CACHE_NAME = ".duplicate_cache.json"
+CACHE_VERSION = 1
+PARTIAL_SIZE = 4 * 1024  # ön filtre: ilk + son 4 KiB
+TM_NAME = "translation_memory.sqlite"
+TM_VERSION = 2  # 1: stage/all'ın Türkçe .msbt'leri "İngilizce" sayılıyordu, kullanılmaz
+
+HASHES = {
+    "sha256": hashlib.sha256,
+    # Kriptografik güvenlik gerekmiyor; BLAKE2b küçük özetle daha hızlı
+    "blake2b": lambda: hashlib.blake2b(digest_size=16),
+}
+
+def file_hash(file_path: Path, algo="sha256", chunk_size=1024 * 1024) -> str:
+    """Dosyanın hash'ini hesaplar (parça parça okur)."""
+    h = HASHES[algo]()
     with open(file_path, "rb") as f:
         while True:
             chunk = f.read(chunk_size)
@@ -14,59 +33,542 @@ def sha256_hash(file_path: Path, chunk_size=1024 * 1024) -> str:
             h.update(chunk)
     return h.hexdigest()
 
-def find_duplicate_xmsbt(folder: str):
-    folder_path = Path(folder)
+def sha256_hash(file_path: Path, chunk_size=1024 * 1024) -> str:
+    """Dosyanın SHA-256 hash'ini hesaplar (parça parça okur)."""
+    return file_hash(file_path, "sha256", chunk_size)
 
-    if not folder_path.exists():
-        print("Klasör bulunamadı:", folder)
-        return
+def partial_hash(file_path: Path, size: int, algo="sha256") -> str:
+    """İlk ve son PARTIAL_SIZE byte'ın hash'i. Küçük dosyalarda tüm dosyayı kapsar."""
+    h = HASHES[algo]()
+    with open(file_path, "rb") as f:
+        h.update(f.read(PARTIAL_SIZE))
+        if size > 2 * PARTIAL_SIZE:
+            f.seek(-PARTIAL_SIZE, os.SEEK_END)
+        h.update(f.read(PARTIAL_SIZE))
+    return h.hexdigest()
 
-    # 1) Önce dosyaları boyutlarına göre grupla (hız için)
-    size_map = defaultdict(list)
+def load_cache(cache_path: Path) -> dict:
+    """{relpath: kayıt}; yoksa/bozuksa boş."""
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
 
-    for root, _, files in os.walk(folder_path):
-        for name in files:
-            if name.lower().endswith(".xmsbt"):
+def save_cache(cache_path: Path, files: dict):
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files},
+                              ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, cache_path)
+
+def scan_files(roots, patterns):
+    """(kök, yol, stat) listesi; desenler dosya adına uygulanır (büyük/küçük harf duyarsız)."""
+    patterns = [p.lower() for p in patterns]
+    skip = {CACHE_NAME, CACHE_NAME + ".tmp", TM_NAME}
+    found = []
+    seen = set()  # iç içe kökler aynı dosyayı iki kez saymasın
+    for root_path in roots:
+        for root, _, files in os.walk(root_path):
+            for name in files:
+                low = name.lower()
+                if name in skip or not any(fnmatch.fnmatchcase(low, p) for p in patterns):
+                    continue
                 path = Path(root) / name
+                real = os.path.realpath(path)
+                if real in seen:
+                    continue
+                seen.add(real)
                 try:
-                    size_map[path.stat().st_size].append(path)
+                    found.append((root_path, path, path.stat()))
                 except OSError:
                     print("Okunamayan dosya:", path)
+    return found
 
-    # 2) Boyutu aynı olanlar arasında hash karşılaştırması yap
-    hash_map = defaultdict(list)
+def find_duplicates(roots, patterns=("*.xmsbt",), algo="sha256", use_cache=True, jobs=8):
+    """
+    Birebir aynı dosya grupları: [(boyut, hash, [yollar])].
+    Boyut -> kısmi hash (ilk/son 4 KiB) -> tam hash sırasıyla elenir; hash'ler
+    iş parçacığı havuzunda hesaplanır (okuma ve hash birbirini bekletmez).
+    Her kök kendi önbelleğini (.duplicate_cache.json) tutar: dosya (boyut,
+    mtime_ns, inode) değişmediyse tekrar okunmaz.
+    """
+    roots = [Path(r) for r in roots]
+    caches = {r: (load_cache(r / CACHE_NAME) if use_cache else {}) for r in roots}
+    new_caches = {r: {} for r in roots}
+    stats = {"partial": 0, "full": 0, "cached": 0}
 
-    for size, paths in size_map.items():
-        if len(paths) < 2:
-            continue  # bu boyutta tek dosya varsa duplicate olamaz
+    def cached(root: Path, path: Path, st: os.stat_result) -> dict:
+        rel = path.relative_to(root).as_posix()
+        new_cache = new_caches[root]
+        if rel in new_cache:
+            return new_cache[rel]
+        entry = caches[root].get(rel)
+        key = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino, "algo": algo}
+        if not entry or any(entry.get(k) != v for k, v in key.items()):
+            entry = key
+        new_cache[rel] = entry
+        return entry
 
-        for p in paths:
+    def compute(kind, path, size):
+        if kind == "partial":
+            return partial_hash(path, size, algo)
+        return file_hash(path, algo)
+
+    def hash_all(items, kind):
+        """items: [(kök, yol, stat)] -> {yol: hash}; önbellekte olmayanlar havuzda hesaplanır."""
+        result = {}
+        todo = []
+        for root, p, st in items:
+            entry = cached(root, p, st)
+            if kind in entry:
+                result[p] = entry[kind]
+                stats["cached"] += 1
+            else:
+                todo.append((entry, p, st))
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+            futures = {ex.submit(compute, kind, p, st.st_size): (entry, p) for entry, p, st in todo}
+            for fut, (entry, p) in futures.items():
+                try:
+                    entry[kind] = result[p] = fut.result()
+                    stats[kind] += 1
+                except OSError:
+                    print("Okunamayan dosya:", p)
+        return result
+
+    # 1) Önce dosyaları boyutlarına göre grupla (hız için)
+    size_map = defaultdict(list)
+    for root, p, st in scan_files(roots, patterns):
+        size_map[st.st_size].append((root, p, st))
+
+    # 2) Boyutu aynı olanlar arasında önce ucuz kısmi hash (ilk/son 4 KiB)
+    same_size = [it for items in size_map.values() if len(items) > 1 for it in items]
+    partials = hash_all(same_size, "partial")
+    partial_map = defaultdict(list)
+    for it in same_size:
+        if it[1] in partials:
+            partial_map[(it[2].st_size, partials[it[1]])].append(it)
+
+    # 3) Kısmi hash'i de aynı olanlar arasında tam hash karşılaştırması yap
+    #    (8 KiB'a kadar olan dosyalarda kısmi hash zaten tüm dosyayı kapsıyor)
+    hash_map = defaultdict(list)
+    need_full = []
+    for (size, part), items in partial_map.items():
+        if len(items) < 2:
+            continue
+        if size <= 2 * PARTIAL_SIZE:
+            hash_map[(size, part)].extend(p for _, p, _ in items)
+        else:
+            need_full.extend(items)
+    fulls = hash_all(need_full, "full")
+    for _, p, st in need_full:
+        if p in fulls:
+            hash_map[(st.st_size, fulls[p])].append(p)
+
+    if use_cache:
+        for root in roots:
+            new_cache = new_caches[root]
+            # Bu çalıştırmada bakılmayan ama hâlâ duran dosyaların kayıtlarını koru
+            for rel, entry in caches[root].items():
+                if rel not in new_cache and (root / rel).exists():
+                    new_cache[rel] = entry
             try:
-                file_hash = sha256_hash(p)
-                hash_map[(size, file_hash)].append(p)
+                save_cache(root / CACHE_NAME, new_cache)
             except OSError:
-                print("Okunamayan dosya:", p)
+                print("Önbellek yazılamadı:", root / CACHE_NAME)
 
-    # 3) Duplicate grupları yazdır
-    duplicates = {k: v for k, v in hash_map.items() if len(v) > 1}
+    print(f"Hash: {algo}, kısmi: {stats['partial']}, tam: {stats['full']}, önbellekten: {stats['cached']}")
+    return [(size, h, sorted(paths)) for (size, h), paths in hash_map.items() if len(paths) > 1]
 
-    if not duplicates:
-        print("✅ Aynı olan .xmsbt dosyası bulunamadı.")
+def print_groups(groups, algo="sha256", label=".xmsbt dosyası"):
+    if not groups:
+        print(f"✅ Aynı olan {label} bulunamadı.")
         return
 
     print("\n✅ Bulunan birebir aynı dosyalar:\n")
 
-    group_no = 1
-    for (size, file_hash), paths in duplicates.items():
+    for group_no, (size, digest, paths) in enumerate(groups, 1):
         print(f"--- Grup {group_no} ---")
         print(f"Boyut: {size} byte")
-        print(f"SHA256: {file_hash}")
+        print(f"{algo.upper()}: {digest}")
         for p in paths:
             print("  ", p)
         print()
-        group_no += 1
+
+def write_report(groups, algo, json_path=None, csv_path=None):
+    if json_path:
+        Path(json_path).write_text(json.dumps({
+            "algo": algo,
+            "groups": [{"size": size, "hash": digest, "paths": [str(p) for p in paths]}
+                       for size, digest, paths in groups],
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        print("Rapor (JSON):", json_path)
+    if csv_path:
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["group", "size", algo, "path"])
+            for group_no, (size, digest, paths) in enumerate(groups, 1):
+                for p in paths:
+                    w.writerow([group_no, size, digest, str(p)])
+        print("Rapor (CSV):", csv_path)
+
+def hardlink_groups(groups, dry_run=False):
+    """Her grupta ilk dosya kalır, diğerleri ona hardlink olur (yer kazanımı)."""
+    linked = 0
+    saved = 0
+    for size, _, paths in groups:
+        keep = paths[0]
+        keep_st = keep.stat()
+        for p in paths[1:]:
+            try:
+                st = p.stat()
+                if (st.st_dev, st.st_ino) == (keep_st.st_dev, keep_st.st_ino):
+                    continue  # zaten aynı dosya
+                if not dry_run:
+                    tmp = p.with_name(p.name + ".tmp_link")
+                    os.link(keep, tmp)
+                    os.replace(tmp, p)
+                linked += 1
+                saved += size
+            except OSError as e:
+                print("Hardlink yapılamadı:", p, "-", e)
+    print(f"{'Hardlink yapılacak' if dry_run else 'Hardlink yapılan'}: {linked} dosya, {saved} byte")
+
+def find_duplicate_xmsbt(folder: str, algo="sha256", use_cache=True):
+    folder_path = Path(folder)
+
+    if not folder_path.exists():
+        print("Klasör bulunamadı:", folder)
+        return
+
+    print_groups(find_duplicates([folder_path], ("*.xmsbt",), algo, use_cache), algo)
+
+def load_msbt():
+    """
+    msbt.py (Kid Icarus Uprising/) sadece giriş düzeyi komutlarda (entries, fanout)
+    gerekir; `files` onsuz da çalışır. Önce normal import, olmazsa üç üst klasör.
+    """
+    try:
+        import msbt
+    except ImportError:
+        parents = Path(__file__).resolve().parents
+        if len(parents) > 3:
+            sys.path.insert(0, str(parents[3]))
+        try:
+            import msbt
+        except ImportError:
+            sys.exit("msbt.py bulunamadı: 'Kid Icarus Uprising' klasörünü PYTHONPATH'e ekleyin.")
+    return msbt
+
+def iter_entries(path: Path):
+    """(label, text) çiftleri; .xmsbt akış halinde okunur."""
+    msbt = load_msbt()
+    if path.suffix.lower() == ".xmsbt":
+        yield from msbt.read_xmsbt(path)
+    else:
+        yield from msbt.MSBT.from_file(path).items()
+
+def translation_pairs(folder_path: Path):
+    """
+    (İngilizce kaynak, Türkçe hedef) dosya çiftleri, yalnızca gerçek en/tr klasörlerinden:
+      - en/X.(x)msbt  <->  ../tr/X.xmsbt (yoksa .msbt)
+    Başka klasörler (ör. stage/all) eşlenmez: oradaki .msbt ve .xmsbt ikisi de
+    Türkçedir; İngilizce kaynağı olan 143 dosya da stage/tr'nin birebir kopyasıdır.
+    Hedef henüz yoksa, olması gereken yol döner.
+    """
+    for root, _, files in os.walk(folder_path):
+        root = Path(root)
+        tr_dir = root.parent / "tr"
+        if root.name != "en" or not tr_dir.is_dir():
+            continue
+        names = set(files)
+        stems = sorted({Path(n).stem for n in names if n.lower().endswith((".xmsbt", ".msbt"))})
+        for stem in stems:
+            src = root / (stem + ".xmsbt") if stem + ".xmsbt" in names else root / (stem + ".msbt")
+            tgt = tr_dir / (stem + ".xmsbt")
+            if not tgt.exists() and (tr_dir / (stem + ".msbt")).exists():
+                tgt = tr_dir / (stem + ".msbt")
+            yield src, tgt
+
+# Oy sayacında İngilizce bırakılmış girişlerin anahtarı: "Türkçesi de aynı" oyu
+KEEP = None
+
+def vote_key(en: str, tr: str):
+    return KEEP if tr == en else tr
+
+def missing(tr) -> bool:
+    """Hedef giriş yok ya da boş."""
+    return tr is None or not tr.strip()
+
+def fill_text(votes: Counter):
+    """
+    Doldurmada kullanılacak çeviri: en sık çeviri, ama sadece İngilizce
+    bırakılmış girişlerin (KEEP) oylarından fazlaysa; "Ah!" gibi iki dilde de
+    aynı olan bir metni tek bir farklı giriş ezemez. Yoksa None.
+    """
+    keep = votes[KEEP]
+    for tr, n in votes.most_common():
+        if tr is not KEEP:
+            return tr if n > keep else None
+    return None
+
+def untranslated(en: str, tr, fill) -> bool:
+    """Doldurulacak giriş: yok, boş, ya da İngilizce bırakılmış ve fill (bkz. fill_text) onu geçiyor."""
+    return missing(tr) or (tr == en and fill is not None)
+
+def find_duplicate_entries(folder: str, map_path=None):
+    """
+    Giriş düzeyi tekrarlar: tüm (etiket, metin) çiftleri tek geçişte indekslenir,
+    aynı İngilizce metin tek kayıt olur. Bir yerde çevrilip başka yerde
+    çevrilmemiş metinler ve farklı çevrilmiş metinler raporlanır; map_path
+    verilirse her benzersiz metin için hedef girişleri içeren dedup haritası yazılır.
+    """
+    folder_path = Path(folder)
+
+    if not folder_path.exists():
+        print("Klasör bulunamadı:", folder)
+        return
+    load_msbt()  # yoksa her dosya için değil, bir kez hata ver
+
+    # İngilizce metin -> {"targets": [(dosya, etiket, çeviri|None)], "tr": Counter (oylar, KEEP dahil)}
+    strings = {}
+    total = 0
+    files = 0
+
+    for src, tgt in translation_pairs(folder_path):
+        try:
+            tr_entries = dict(iter_entries(tgt)) if tgt.exists() else {}
+            en_entries = iter_entries(src)
+            files += 1
+            for label, en in en_entries:
+                if not en.strip():
+                    continue
+                total += 1
+                tr = tr_entries.get(label)
+                if missing(tr):
+                    tr = None
+                s = strings.get(en)
+                if s is None:
+                    s = strings[en] = {"targets": [], "tr": Counter()}
+                s["targets"].append((tgt.relative_to(folder_path).as_posix()
+                                     if tgt.is_relative_to(folder_path) else str(tgt), label, tr))
+                if tr is not None:
+                    s["tr"][vote_key(en, tr)] += 1
+        except Exception as e:
+            print("Okunamayan dosya:", src, "-", e)
+
+    # fan-out ile aynı ölçüt: İngilizce bırakılmış girişler, çeviri oyları onları geçmedikçe çevrilmiş sayılır
+    for en, s in strings.items():
+        s["fill"] = fill_text(s["tr"])
+        s["todo"] = [t for t in s["targets"] if untranslated(en, t[2], s["fill"])]
+    partial = {en: s for en, s in strings.items() if s["fill"] is not None and s["todo"]}
+    conflicts = {en: s for en, s in strings.items() if len(s["tr"]) > 1}
+    fan_out = sum(len(s["todo"]) for s in partial.values())
+
+    print(f"Dosya çifti: {files}, giriş: {total}, benzersiz İngilizce metin: {len(strings)}")
+    print(f"Bir yerde çevrilmiş, başka yerde çevrilmemiş: {len(partial)} metin ({fan_out} giriş otomatik doldurulabilir)")
+    print(f"Farklı şekillerde çevrilmiş: {len(conflicts)} metin")
+
+    for en, s in list(partial.items())[:20]:
+        todo = [f"{f}#{l}" for f, l, tr in s["todo"]]
+        print(f"\n--- {en[:60]!r}")
+        print(f"Çeviri: {s['fill'][:60]!r}")
+        for m in todo[:5]:
+            print("   çevrilmemiş:", m)
+
+    if map_path:
+        out = []
+        for en, s in strings.items():
+            item = {
+                "en": en,
+                "tr": s["fill"],
+                "entries": [{"file": f, "label": l, "translated": not untranslated(en, tr, s["fill"])}
+                            for f, l, tr in s["targets"]],
+            }
+            if len(s["tr"]) > 1:
+                item["variants"] = {en if tr is KEEP else tr: n for tr, n in s["tr"].items()}
+            out.append(item)
+        Path(map_path).write_text(json.dumps({"version": 1, "strings": out},
+                                             ensure_ascii=False, indent=1), encoding="utf-8")
+        print("\n✅ Dedup haritası yazıldı:", map_path)
+
+def normalize_text(text: str) -> str:
+    """Çeviri belleği anahtarı için: satır sonları tek tip, satır başı/sonu boşlukları yok."""
+    return "\n".join(line.strip() for line in text.replace("\r\n", "\n").split("\n")).strip()
+
+def text_key(text: str) -> int:
+    """Normalize edilmiş İngilizce metnin 64 bit BLAKE2b anahtarı (SQLite INTEGER)."""
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def load_tm(tm_path: Path) -> dict:
+    """{anahtar: (İngilizce, Türkçe)}; dosya yoksa ya da eski sürümse boş."""
+    if not tm_path.exists():
+        return {}
+    conn = sqlite3.connect(str(tm_path))
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != TM_VERSION:
+            print("Eski çeviri belleği yok sayıldı, yeniden oluşturulacak:", tm_path)
+            return {}
+        return {k: (en, tr) for k, en, tr in conn.execute("SELECT key, en, tr FROM tm")}
+    finally:
+        conn.close()
+
+def save_tm(tm_path: Path, tm: dict):
+    conn = sqlite3.connect(str(tm_path))
+    try:
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS tm (key INTEGER PRIMARY KEY, en TEXT NOT NULL, tr TEXT NOT NULL)")
+            conn.execute("DELETE FROM tm")
+            conn.executemany("INSERT INTO tm VALUES (?, ?, ?)", [(k, en, tr) for k, (en, tr) in tm.items()])
+            conn.execute(f"PRAGMA user_version = {TM_VERSION}")
+    finally:
+        conn.close()
+
+def fan_out_translations(folder: str, tm_path=None, dry_run=False):
+    """
+    Çeviri belleği: klasördeki gerçek en/tr çiftlerinden (translation_pairs)
+    normalize edilmiş İngilizce metin -> Türkçe çeviri çıkarılır, kayıtlı bellekle
+    birleştirilir (çakışmada ağaçtaki en sık çeviri kazanır) ve bilinen bir
+    İngilizce metnin geçtiği her çevrilmemiş tr girişi doldurulur (bkz. fill_text:
+    İngilizce bırakılmış girişler "aynı kalsın" oyu sayılır). Ağaç tek
+    geçişte okunur; sadece .xmsbt hedefler yazılır. Çevrilmiş bir giriş asla
+    değişmez: yazdıktan sonra dosya yeniden okunur, değişen olursa eski hali geri yazılır.
+    """
+    folder_path = Path(folder)
+
+    if not folder_path.exists():
+        print("Klasör bulunamadı:", folder)
+        return
+
+    tm_path = Path(tm_path) if tm_path else folder_path / TM_NAME
+    msbt = load_msbt()
+
+    # 1) Tek geçiş: her çift okunur, boş olmayan girişler oylanır (İngilizce bırakılanlar KEEP)
+    pairs = []
+    votes = defaultdict(Counter)
+    english = {}
+    for src, tgt in translation_pairs(folder_path):
+        try:
+            src_entries = list(iter_entries(src))
+            tgt_entries = dict(iter_entries(tgt)) if tgt.exists() else {}
+        except Exception as e:
+            print("Okunamayan dosya:", src, "-", e)
+            continue
+        pairs.append((tgt, src_entries, tgt_entries))
+        for label, en in src_entries:
+            tr = tgt_entries.get(label)
+            if en.strip() and not missing(tr):
+                key = text_key(en)
+                votes[key][vote_key(en, tr)] += 1
+                english.setdefault(key, en)
+
+    # 2) Belleği güncelle; ağaçta kazanan çeviri yoksa metin olduğu gibi kalır (tr == en)
+    tm = load_tm(tm_path)
+    fills = {key: fill_text(counter) for key, counter in votes.items()}
+    for key, fill in fills.items():
+        tm[key] = (english[key], english[key] if fill is None else fill)
+    if not dry_run:
+        save_tm(tm_path, tm)
+
+    # 3) Çevrilmemiş girişleri doldur
+    filled = 0
+    files_changed = 0
+    skipped_msbt = 0
+    for tgt, src_entries, tgt_entries in pairs:
+        updates = {}
+        for label, en in src_entries:
+            if not en.strip():
+                continue
+            key = text_key(en)
+            if key in fills:
+                fill = fills[key]
+            else:
+                known = tm.get(key)
+                fill = known[1] if known and known[1] != en else None
+            if fill is not None and untranslated(en, tgt_entries.get(label), fill):
+                updates[label] = fill
+        if not updates:
+            continue
+        if tgt.suffix.lower() != ".xmsbt":
+            skipped_msbt += len(updates)
+            continue
+        if dry_run:
+            n = len(updates)
+        else:
+            original = tgt.read_bytes() if tgt.exists() else None
+            try:
+                n = msbt.update_xmsbt(tgt, updates, [label for label, _ in src_entries])
+                after = dict(iter_entries(tgt))
+            except Exception as e:
+                print("Yazılamayan dosya:", tgt, "-", e)
+                continue
+            # Güvenlik: doldurulanlar dışında hiçbir giriş değişmemeli
+            changed = [label for label, tr in tgt_entries.items()
+                       if label not in updates and after.get(label) != tr]
+            if changed:
+                if original is None:
+                    tgt.unlink()
+                else:
+                    tgt.write_bytes(original)
+                print(f"[X] {tgt}: çevrilmiş girişler değişecekti ({', '.join(changed[:5])}), dosya geri alındı")
+                continue
+        if n:
+            filled += n
+            files_changed += 1
+            print(f"  {tgt}: {n} giriş")
+
+    print(f"Çeviri belleği: {len(tm)} metin ({tm_path})")
+    print(f"{'Doldurulacak' if dry_run else 'Doldurulan'} giriş: {filled}, dosya: {files_changed}")
+    if skipped_msbt:
+        print(f"Hedefi .msbt olan {skipped_msbt} giriş atlandı (önce .xmsbt'ye çevir)")
+
+def main():
+    ap = argparse.ArgumentParser(description="Tekrar eden xmsbt/msbt dosyalarını ve girişlerini bulur.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_f = sub.add_parser("files", help="Birebir aynı dosyalar.")
+    ap_f.add_argument("roots", nargs="+", type=Path, help="Taranacak klasörler (alt klasörler dahil).")
+    ap_f.add_argument("-p", "--pattern", action="append",
+                      help='Dosya adı deseni, tekrarlanabilir (varsayılan: "*.xmsbt"; hepsi için "*").')
+    ap_f.add_argument("--algo", choices=list(HASHES), default="sha256", help="Hash (blake2b daha hızlı).")
+    ap_f.add_argument("--no-cache", action="store_true", help=f"{CACHE_NAME} kullanma/yazma.")
+    ap_f.add_argument("-j", "--jobs", type=int, default=8, help="Hash iş parçacığı sayısı.")
+    ap_f.add_argument("--json", help="Grupları JSON olarak yaz.")
+    ap_f.add_argument("--csv", help="Grupları CSV olarak yaz.")
+    ap_f.add_argument("--hardlink", action="store_true", help="Kopyaları gruptaki ilk dosyaya hardlink yap.")
+    ap_f.add_argument("--dry-run", action="store_true", help="--hardlink: sadece ne yapılacağını yaz.")
+    ap_f.add_argument("-q", "--quiet", action="store_true", help="Grupları ekrana yazma.")
+
+    ap_e = sub.add_parser("entries", help="Giriş (etiket/metin) düzeyi tekrarlar.")
+    ap_e.add_argument("root", type=Path)
+    ap_e.add_argument("--map", help="Dedup haritasını JSON olarak yaz.")
+
+    ap_t = sub.add_parser("fanout", help="Çeviri belleği ile çevrilmemiş tr girişlerini doldur.")
+    ap_t.add_argument("root", type=Path)
+    ap_t.add_argument("--tm", help=f"Çeviri belleği dosyası (varsayılan: ROOT/{TM_NAME}).")
+    ap_t.add_argument("--dry-run", action="store_true", help="Dosyalara yazma, sadece say.")
+
+    args = ap.parse_args()
+
+    if args.cmd == "files":
+        missing = [r for r in args.roots if not r.exists()]
+        if missing:
+            for r in missing:
+                print("Klasör bulunamadı:", r)
+            sys.exit(1)
+        patterns = args.pattern or ["*.xmsbt"]
+        groups = find_duplicates(args.roots, patterns, args.algo, not args.no_cache, args.jobs)
+        if not args.quiet:
+            print_groups(groups, args.algo, "dosya")
+        write_report(groups, args.algo, args.json, args.csv)
+        if args.hardlink:
+            hardlink_groups(groups, args.dry_run)
+    elif args.cmd == "entries":
+        find_duplicate_entries(args.root, args.map)
+    elif args.cmd == "fanout":
+        fan_out_translations(args.root, args.tm, args.dry_run)
 
 if __name__ == "__main__":
-    # Buraya klasör yolunu yaz
-    target_folder = r"D:\Users\furka\Documents\3ds test\kidicarus\msbt_out\romfs_dir\eu\stage_DEC_OUT\__msbt__\en"
-    find_duplicate_xmsbt(target_folder)
+    main()
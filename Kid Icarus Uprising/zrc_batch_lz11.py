@@ -1,18 +1,181 @@
 # zrc_batch_lz11.py
-# Batch LZ11 decompress/compress for .zrc files (Kid Icarus Uprising etc.)
+# Batch LZ11 (and LZ10) decompress/compress for .zrc files (Kid Icarus Uprising etc.)
 # Usage:
-#   py -3 zrc_batch_lz11.py unpack "INPUT_FOLDER"
-#   py -3 zrc_batch_lz11.py pack   "DECOMPRESSED_FOLDER"
+#   py -3 zrc_batch_lz11.py unpack "INPUT_FOLDER" [-j N]
+#   py -3 zrc_batch_lz11.py pack   "DECOMPRESSED_FOLDER" [--level fast|default|max] [--format auto|LZ10|LZ11] [-j N]
+#   py -3 zrc_batch_lz11.py verify "INPUT_FOLDER"
+#   py -3 zrc_batch_lz11.py bench  ["ZRC_FOLDER"] [--level L ...] [--json out.json]
 
 from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
 import sys
+import time
+import tracemalloc
 from pathlib import Path
-from collections import defaultdict
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
 
 WINDOW_SIZE = 0x1000         # LZ11 sliding window
-MAX_MATCH_LEN = 0x110        # 272 (so we only use 2-byte or 3-byte length encoding)
+WINDOW_MASK = WINDOW_SIZE - 1
+MAX_MATCH_LEN = 0x110        # 272, longest match for the 2-byte/3-byte forms
+MAX_MATCH_LEN_LONG = 0x10110 # 65808, longest match for the 4-byte form
+LZ10_MAX_MATCH_LEN = 0x12    # 18, LZ10 only has the 2-byte form
+
+HASH_BITS = 15               # 3 bytes * HASH_SHIFT bits fit exactly in the hash
+HASH_SIZE = 1 << HASH_BITS
+HASH_MASK = HASH_SIZE - 1
+HASH_SHIFT = 5
+DEFAULT_CHAIN_DEPTH = 16     # candidates checked per position
+DEFAULT_INSERT_LIMIT = 8     # positions indexed from the start of each match
+OPTIMAL_SKIP_LEN = 32        # "max" level: no new search inside matches this long
+STREAM_BLOCK = 0x10000       # LZ11Compressor parses input in pieces of this size
+STREAM_CHUNK = 0x10000       # read size for file-to-file streaming
+
+MANIFEST_NAME = "zrc_manifest.json"   # kept in _DEC_OUT / _PACKED_ZRC for incremental runs
+MANIFEST_VERSION = 1
+
+BENCH_DEFAULT_DIR = Path(__file__).resolve().parent / "0004000000030200" / "romfs" / "eu" / "menu"
+
+def _lz_header(data: bytes, magic: int = 0x11) -> tuple[int, int]:
+    """Returns (out_size, pos) where pos is the first flags byte."""
+    if not data or data[0] != magic:
+        raise ValueError(f"Bu dosya LZ{magic:X} (0x{magic:02X}) ile başlamıyor.")
+
+    out_size = data[1] | (data[2] << 8) | (data[3] << 16)
+    pos = 4
+
+    # Some variants store 32-bit size when 3-byte size is zero
+    if out_size == 0:
+        out_size = int.from_bytes(data[pos:pos+4], "little")
+        pos += 4
+
+    return out_size, pos
+
+def _lz_decompress(data: bytes, magic: int) -> bytes:
+    out_size, pos = _lz_header(data, magic)
+    n = len(data)
+    lz10 = magic == 0x10
+
+    # Output is preallocated from the header size; o is the write position
+    out = bytearray(out_size)
+    o = 0
+    while o < out_size and pos < n:
+        flags = data[pos]
+        pos += 1
+
+        if flags == 0:
+            # 8 literals in a row: one slice copy
+            run = min(8, out_size - o, n - pos)
+            out[o:o+run] = data[pos:pos+run]
+            o += run
+            pos += run
+            continue
+
+        mask = 0x80
+        while mask and o < out_size and pos < n:
+            if not (flags & mask):
+                # literal run: count the following zero flag bits too
+                run = 1
+                mask >>= 1
+                while mask and not (flags & mask):
+                    run += 1
+                    mask >>= 1
+                run = min(run, out_size - o, n - pos)
+                out[o:o+run] = data[pos:pos+run]
+                o += run
+                pos += run
+                continue
+
+            mask >>= 1
+            b1 = data[pos]
+            t = b1 >> 4
+
+            if lz10:
+                # LZ10 has a single 2-byte form: length 3..18
+                if pos + 1 >= n:
+                    return bytes(out[:o])
+                b2 = data[pos + 1]
+                pos += 2
+
+                length = t + 3
+                disp = (((b1 & 0x0F) << 8) | b2) + 1
+
+            elif t == 0:
+                # 3-byte length
+                if pos + 2 >= n:
+                    return bytes(out[:o])
+                b2 = data[pos + 1]
+                b3 = data[pos + 2]
+                pos += 3
+
+                length = (((b1 & 0x0F) << 4) | (b2 >> 4)) + 0x11
+                disp = (((b2 & 0x0F) << 8) | b3) + 1
+
+            elif t == 1:
+                # 4-byte length
+                if pos + 3 >= n:
+                    return bytes(out[:o])
+                b2 = data[pos + 1]
+                b3 = data[pos + 2]
+                b4 = data[pos + 3]
+                pos += 4
+
+                length = (((b1 & 0x0F) << 12) | (b2 << 4) | (b3 >> 4)) + 0x111
+                disp = (((b3 & 0x0F) << 8) | b4) + 1
+
+            else:
+                # 2-byte length
+                if pos + 1 >= n:
+                    return bytes(out[:o])
+                b2 = data[pos + 1]
+                pos += 2
+
+                length = t + 1
+                disp = (((b1 & 0x0F) << 8) | b2) + 1
+
+            if disp > o:
+                raise ValueError("Geçersiz geri referans (disp). Dosya bozuk olabilir.")
+
+            if length > out_size - o:
+                length = out_size - o
+
+            start = o - disp
+            if disp >= length:
+                # non-overlapping: single slice copy
+                out[o:o+length] = out[start:start+length]
+                o += length
+            else:
+                # overlapping: the copied region doubles on every step
+                end = o + length
+                while o < end:
+                    chunk = min(o - start, end - o)
+                    out[o:o+chunk] = out[start:start+chunk]
+                    o += chunk
+
+    if o < out_size:
+        del out[o:]
+    return bytes(out)
+
+def lz10_decompress(data: bytes) -> bytes:
+    return _lz_decompress(data, 0x10)
 
 def lz11_decompress(data: bytes) -> bytes:
+    return _lz_decompress(data, 0x11)
+
+def _lz11_decompress_ref(data: bytes) -> bytes:
+    """Original byte-at-a-time decoder, kept as reference for `verify`."""
     if not data or data[0] != 0x11:
         raise ValueError("Bu dosya LZ11 (0x11) ile başlamıyor.")
 
@@ -90,122 +253,524 @@ def lz11_decompress(data: bytes) -> bytes:
 
     return bytes(out)
 
-def _find_best_match(data: bytes, pos: int, index: dict[bytes, list[int]]) -> tuple[int, int]:
-    """Returns (best_len, best_disp). best_len>=3 means use a reference."""
-    if pos + 3 > len(data):
-        return (0, 0)
+class _HashChain:
+    """
+    Hash-chain match finder for the LZ11 window.
 
-    key = data[pos:pos+3]
-    candidates = index.get(key)
-    if not candidates:
-        return (0, 0)
+    head[h] holds the newest position whose 3-byte prefix hashes to h, and
+    prev[pos & WINDOW_MASK] links each position to the previous one with the
+    same hash. Both are int arrays, so no per-position bytes objects are made.
 
-    best_len = 0
-    best_disp = 0
+    Positions index into `data`, which may grow at the end; trim() drops
+    bytes from the front for streaming use.
 
-    # Search candidates from newest to oldest, but only inside window
-    for p in reversed(candidates):
-        disp = pos - p
-        if disp <= 0:
-            continue
-        if disp > WINDOW_SIZE:
-            break
+    Parsers insert everything up to the next token, so a long span is the
+    inside of a match; only its first `insert_limit` positions are added.
+    Skipped positions cost nothing and keep prev[] valid, since a slot is
+    only reused one window later.
+    """
+
+    def __init__(self, data: bytes | bytearray, chain_depth: int = DEFAULT_CHAIN_DEPTH,
+                 max_len: int = MAX_MATCH_LEN, nice_len: int | None = None,
+                 insert_limit: int = DEFAULT_INSERT_LIMIT):
+        self.data = data
+        self.chain_depth = max(1, chain_depth)
+        self.max_len = max_len
+        # stop walking the chain once a match this long is found
+        self.nice_len = min(nice_len or max_len, max_len)
+        self.insert_limit = max(1, insert_limit)
+        self.head = array("i", [-1]) * HASH_SIZE
+        self.prev = array("i", [-1]) * WINDOW_SIZE
+        self.next_pos = 0
 
-        max_len = min(MAX_MATCH_LEN, len(data) - pos)
-        length = 3
-        while length < max_len and data[p + length] == data[pos + length]:
-            length += 1
+    def insert_until(self, end: int) -> None:
+        """Adds positions in [next_pos, end) to the chains, at most insert_limit of them."""
+        data = self.data
+        if end > len(data) - 2:
+            end = len(data) - 2
+        i = self.next_pos
+        if i >= end:
+            return
+        self.next_pos = end
+        if end - i > self.insert_limit:
+            end = i + self.insert_limit
+        head = self.head
+        prev = self.prev
+        while i < end:
+            h = ((data[i] << (2 * HASH_SHIFT)) ^ (data[i + 1] << HASH_SHIFT) ^ data[i + 2]) & HASH_MASK
+            prev[i & WINDOW_MASK] = head[h]
+            head[h] = i
+            i += 1
+
+    def trim(self, k: int) -> None:
+        """Forgets the first k bytes of data (k must be a multiple of WINDOW_SIZE)."""
+        del self.data[:k]
+        self.head = array("i", [v - k if v >= k else -1 for v in self.head])
+        self.prev = array("i", [v - k if v >= k else -1 for v in self.prev])
+        self.next_pos -= k
+
+    def find(self, pos: int, end: int | None = None) -> tuple[int, int]:
+        """Returns (best_len, best_disp). best_len>=3 means use a reference."""
+        data = self.data
+        max_len = (len(data) if end is None else end) - pos
+        if max_len > self.max_len:
+            max_len = self.max_len
+        if max_len < 3:
+            return (0, 0)
 
-        if length > best_len:
-            best_len = length
-            best_disp = disp
-            if best_len == max_len:
+        h = ((data[pos] << (2 * HASH_SHIFT)) ^ (data[pos + 1] << HASH_SHIFT) ^ data[pos + 2]) & HASH_MASK
+        p = self.head[h]
+        limit = pos - WINDOW_SIZE
+        if limit < 0:
+            limit = 0
+        if p < limit:
+            return (0, 0)
+        prev = self.prev
+
+        best_len = 2
+        best_disp = 0
+        nice_len = self.nice_len if self.nice_len < max_len else max_len
+        depth = self.chain_depth
+        while p >= limit and depth:
+            depth -= 1
+            # A candidate is only interesting if it beats best_len: check the
+            # byte that would extend it first, then settle it with one slice
+            # comparison (this also weeds out hash collisions).
+            want = best_len + 1
+            if data[p + best_len] == data[pos + best_len] and data[p:p+want] == data[pos:pos+want]:
+                length = want
+                while length + 16 <= max_len and data[p+length:p+length+16] == data[pos+length:pos+length+16]:
+                    length += 16
+                while length < max_len and data[p + length] == data[pos + length]:
+                    length += 1
+                best_len = length
+                best_disp = pos - p
+                if length >= nice_len:
+                    break
+            q = prev[p & WINDOW_MASK]
+            if q >= p:
                 break
+            p = q
 
-    if best_len < 3:
-        return (0, 0)
-    return (best_len, best_disp)
+        if best_len < 3:
+            return (0, 0)
+        return (best_len, best_disp)
 
-def lz11_compress(raw: bytes) -> bytes:
-    n = len(raw)
-    out = bytearray()
+# Parsers turn data[start:end] into tokens: (0, 0) is a literal, anything
+# else is (length, disp). They return (tokens, position after the last token).
+# token_bits(length) gives the encoded size of a match, for cost-based parsers.
 
-    # Header
-    out.append(0x11)
-    if n <= 0xFFFFFF:
-        out += n.to_bytes(3, "little")
-    else:
-        out += (0).to_bytes(3, "little")
-        out += n.to_bytes(4, "little")
+def _parse_greedy(chain: _HashChain, start: int, end: int, token_bits=None) -> tuple[list[tuple[int, int]], int]:
+    """Always takes the longest match at the current position."""
+    tokens = []
+    i = start
+    while i < end:
+        # Every position before i is in the chains, i itself is not yet
+        chain.insert_until(i)
+        best_len, best_disp = chain.find(i)
+        if best_len >= 3:
+            tokens.append((best_len, best_disp))
+            i += best_len
+        else:
+            tokens.append((0, 0))
+            i += 1
+    return tokens, i
 
-    index: dict[bytes, list[int]] = defaultdict(list)
+def _parse_lazy(chain: _HashChain, start: int, end: int, token_bits=None) -> tuple[list[tuple[int, int]], int]:
+    """Like greedy, but emits a literal when the match at i+1 is longer."""
+    tokens = []
+    i = start
+    chain.insert_until(i)
+    cur_len, cur_disp = chain.find(i)
+    while i < end:
+        if cur_len < 3:
+            tokens.append((0, 0))
+            i += 1
+            chain.insert_until(i)
+            cur_len, cur_disp = chain.find(i)
+            continue
+
+        if cur_len < chain.max_len and i + 1 < len(chain.data):
+            chain.insert_until(i + 1)
+            next_len, next_disp = chain.find(i + 1)
+            if next_len > cur_len:
+                tokens.append((0, 0))
+                i += 1
+                cur_len, cur_disp = next_len, next_disp
+                continue
+
+        tokens.append((cur_len, cur_disp))
+        i += cur_len
+        if i < end:
+            chain.insert_until(i)
+            cur_len, cur_disp = chain.find(i)
+    return tokens, i
+
+def _token_bits_lz11(length: int) -> int:
+    """Encoded size of a reference in bits, flag bit included."""
+    if length <= 0x10:
+        return 17
+    if length <= 0x110:
+        return 25
+    return 33
+
+def _token_bits_lz10(length: int) -> int:
+    return 17
+
+def _parse_optimal(chain: _HashChain, start: int, end: int,
+                   token_bits=_token_bits_lz11) -> tuple[list[tuple[int, int]], int]:
+    """
+    Minimum-size parse: finds the longest match at every position, then a
+    backwards dynamic-programming pass picks, for each position, the literal
+    or match length that minimizes the total encoded size to the end.
+    Matches do not cross `end`, so the parse stops exactly there.
+    """
+    n = end - start
+    match_len = array("i", [0]) * n
+    match_disp = array("i", [0]) * n
 
     i = 0
-    flags_pos = len(out)
-    out.append(0)
-    flags = 0
-    bit = 0
-
-    def flush_flags():
-        nonlocal flags_pos, flags, bit
-        out[flags_pos] = flags
-        flags_pos = len(out)
-        out.append(0)
-        flags = 0
-        bit = 0
+    while i < n:
+        chain.insert_until(start + i)
+        best_len, best_disp = chain.find(start + i, end)
+        if best_len < 3:
+            i += 1
+            continue
+        match_len[i] = best_len
+        match_disp[i] = best_disp
+        if best_len < OPTIMAL_SKIP_LEN:
+            i += 1
+            continue
+        # Inside a long match the same reference shifted by one is almost
+        # always the best one; skip the search there.
+        first = i
+        last = i + best_len - 2
+        i += 1
+        while i < last:
+            match_len[i] = best_len - (i - first)
+            match_disp[i] = best_disp
+            i += 1
+
+    # cost[i] = bits needed to encode data[start+i:end]
+    cost = array("q", [0]) * (n + 1)
+    choice = array("i", [0]) * n
+    for i in range(n - 1, -1, -1):
+        best = cost[i + 1] + 9
+        pick = 0
+        ml = match_len[i]
+        if ml >= 3:
+            # every prefix of the longest match is a valid match too; the
+            # short ones and the length-class boundaries are the candidates
+            cands = list(range(3, min(ml, 18) + 1))
+            if ml > 18:
+                if ml > 0x110:
+                    cands.append(0x110)
+                cands.append(ml)
+            for length in cands:
+                c = cost[i + length] + token_bits(length)
+                if c < best:
+                    best = c
+                    pick = length
+        cost[i] = best
+        choice[i] = pick
 
+    tokens = []
+    i = 0
     while i < n:
-        # Update index with current position for future matches
-        if i + 3 <= n:
-            index[raw[i:i+3]].append(i)
-            # Keep index lists from growing too much (optional small pruning)
-            if len(index[raw[i:i+3]]) > 256:
-                index[raw[i:i+3]] = index[raw[i:i+3]][-256:]
+        length = choice[i]
+        if length:
+            tokens.append((length, match_disp[i]))
+            i += length
+        else:
+            tokens.append((0, 0))
+            i += 1
+    return tokens, end
 
-        best_len, best_disp = _find_best_match(raw, i, index)
+# level -> (parser, chain depth, longest match emitted, capped by the format)
+LEVELS = {
+    "fast": (_parse_greedy, 8, MAX_MATCH_LEN),
+    "default": (_parse_lazy, DEFAULT_CHAIN_DEPTH, MAX_MATCH_LEN),
+    "max": (_parse_optimal, 256, MAX_MATCH_LEN_LONG),
+}
 
-        if best_len >= 3:
-            # Mark this bit as "reference"
-            flags |= (0x80 >> bit)
+def _lz_header_bytes(size: int, magic: int = 0x11) -> bytes:
+    if size <= 0xFFFFFF:
+        return bytes([magic]) + size.to_bytes(3, "little")
+    return bytes([magic, 0, 0, 0]) + size.to_bytes(4, "little")
+
+class _LZDecompressor:
+    """
+    Incremental LZ10/LZ11 decoder: feed() compressed chunks, get decompressed
+    chunks back. Only the last WINDOW_SIZE output bytes and an incomplete
+    trailing token are kept between calls.
+    """
+
+    MAGIC = 0x11
 
-            # Clamp to max we encode (<=272)
-            if best_len > MAX_MATCH_LEN:
-                best_len = MAX_MATCH_LEN
+    def __init__(self):
+        self.out_size: int | None = None   # known once the header is in
+        self.produced = 0
+        self._in = bytearray()
+        self._hist = bytearray()
+        self._flags = 0
+        self._mask = 0   # next flag bit; 0 means a new flags byte is due
 
-            disp_minus_1 = best_disp - 1
+    @property
+    def eof(self) -> bool:
+        return self.out_size is not None and self.produced >= self.out_size
 
-            if best_len <= 0x10:
-                # 2-byte form: length = t+1 where t in [2..15]
-                t = best_len - 1  # 2..15
-                b1 = ((t & 0x0F) << 4) | ((disp_minus_1 >> 8) & 0x0F)
-                b2 = disp_minus_1 & 0xFF
-                out += bytes([b1, b2])
+    def feed(self, chunk: bytes) -> bytes:
+        data = self._in
+        data += chunk
+
+        if self.out_size is None:
+            if len(data) < 4 or (len(data) < 8 and data[1:4] == b"\x00\x00\x00"):
+                if data and data[0] != self.MAGIC:
+                    _lz_header(data, self.MAGIC)
+                return b""
+            self.out_size, pos = _lz_header(data, self.MAGIC)
+            del data[:pos]
+
+        buf = self._hist
+        start = len(buf)
+        remaining = self.out_size - self.produced
+        o_end = start + remaining
+        o = start
+        n = len(data)
+        pos = 0
+        flags = self._flags
+        mask = self._mask
+        lz10 = self.MAGIC == 0x10
+
+        while o < o_end:
+            if not mask:
+                if pos >= n:
+                    break
+                flags = data[pos]
+                pos += 1
+                mask = 0x80
+
+            if not (flags & mask):
+                # literal run, limited by the input we have
+                avail = min(n - pos, o_end - o)
+                if not avail:
+                    break
+                run = 0
+                while mask and not (flags & mask) and run < avail:
+                    run += 1
+                    mask >>= 1
+                buf += data[pos:pos+run]
+                o += run
+                pos += run
+                continue
+
+            if pos >= n:
+                break
+            b1 = data[pos]
+            t = b1 >> 4
+            need = 2 if lz10 else 3 if t == 0 else 4 if t == 1 else 2
+            if pos + need > n:
+                break
+
+            if lz10:
+                length = t + 3
+                disp = (((b1 & 0x0F) << 8) | data[pos + 1]) + 1
+            elif t == 0:
+                b2 = data[pos + 1]
+                length = (((b1 & 0x0F) << 4) | (b2 >> 4)) + 0x11
+                disp = (((b2 & 0x0F) << 8) | data[pos + 2]) + 1
+            elif t == 1:
+                b2 = data[pos + 1]
+                b3 = data[pos + 2]
+                length = (((b1 & 0x0F) << 12) | (b2 << 4) | (b3 >> 4)) + 0x111
+                disp = (((b3 & 0x0F) << 8) | data[pos + 3]) + 1
             else:
-                # 3-byte form: length = x + 0x11, x in [0..0xFF]
-                x = best_len - 0x11  # 0..255
-                b1 = ((0 & 0x0F) << 4) | ((x >> 4) & 0x0F)
-                b2 = ((x & 0x0F) << 4) | ((disp_minus_1 >> 8) & 0x0F)
-                b3 = disp_minus_1 & 0xFF
-                out += bytes([b1, b2, b3])
+                length = t + 1
+                disp = (((b1 & 0x0F) << 8) | data[pos + 1]) + 1
+            pos += need
+            mask >>= 1
 
-            i += best_len
-        else:
-            # Literal
-            out.append(raw[i])
-            i += 1
+            if disp > len(buf):
+                raise ValueError("Geçersiz geri referans (disp). Dosya bozuk olabilir.")
+            if length > o_end - o:
+                length = o_end - o
 
-        bit += 1
-        if bit == 8:
-            flush_flags()
+            src = o - disp
+            if disp >= length:
+                buf += buf[src:src+length]
+            else:
+                # overlapping: the copied region doubles on every step
+                end = o + length
+                while len(buf) < end:
+                    buf += buf[src:src + min(len(buf) - src, end - len(buf))]
+            o += length
 
-    # Write last flags
-    out[flags_pos] = flags
+        del data[:pos]
+        self._flags = flags
+        self._mask = mask
+        self.produced += o - start
+        out = bytes(buf[start:])
+        del buf[:max(0, len(buf) - WINDOW_SIZE)]
+        return out
 
-    # Remove trailing empty flags byte if no data followed it
-    if len(out) >= 1 and out[-1] == 0 and out[flags_pos] == 0 and flags_pos == len(out)-1:
-        out.pop()
+    def flush(self) -> bytes:
+        """Ends the stream; nothing is buffered, so this only checks the header arrived."""
+        if self.out_size is None:
+            _lz_header(bytes(self._in), self.MAGIC)
+        return b""
 
-    return bytes(out)
+class LZ10Decompressor(_LZDecompressor):
+    MAGIC = 0x10
+
+class LZ11Decompressor(_LZDecompressor):
+    MAGIC = 0x11
+
+class _LZCompressor:
+    """
+    Incremental LZ10/LZ11 encoder. The uncompressed size goes into the header,
+    so it has to be known up front. feed() takes raw chunks and returns the
+    compressed bytes that are final so far; flush() returns the rest.
+
+    Input is parsed in STREAM_BLOCK pieces, keeping the window plus one
+    block and the longest-match lookahead in memory.
+    """
+
+    MAGIC = 0x11
+    MAX_LEN = MAX_MATCH_LEN_LONG
+    TOKEN_BITS = staticmethod(_token_bits_lz11)
+
+    def __init__(self, size: int, level: str = "default", chain_depth: int | None = None):
+        if level not in LEVELS:
+            raise ValueError(f"Gecersiz seviye: {level} ({', '.join(LEVELS)})")
+        self.size = size
+        self.consumed = 0
+        self._parse, depth, max_len = LEVELS[level]
+        self._buf = bytearray()
+        self._chain = _HashChain(self._buf, chain_depth or depth, min(max_len, self.MAX_LEN))
+        self._pos = 0   # next position to parse, relative to _buf
+        self._out = bytearray(_lz_header_bytes(size, self.MAGIC))
+        self._flags_pos = 0
+        self._flags = 0
+        self._bit = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self.consumed + len(chunk) > self.size:
+            raise ValueError(f"{type(self).__name__}: header boyutundan fazla veri geldi.")
+        self._buf += chunk
+        self.consumed += len(chunk)
+        lookahead = self._chain.max_len + 1
+        while len(self._buf) - self._pos >= STREAM_BLOCK + lookahead:
+            self._step(self._pos + STREAM_BLOCK)
+        return self._take()
+
+    def flush(self) -> bytes:
+        if self.consumed != self.size:
+            raise ValueError(f"{type(self).__name__}: {self.size} byte bekleniyordu, {self.consumed} geldi.")
+        while self._pos < len(self._buf):
+            self._step(min(self._pos + STREAM_BLOCK, len(self._buf)))
+        if self._bit:
+            self._out[self._flags_pos] = self._flags
+            self._bit = 0
+        return self._take()
+
+    def _step(self, end: int) -> None:
+        start = self._pos
+        tokens, self._pos = self._parse(self._chain, start, end, self.TOKEN_BITS)
+        self._encode(tokens, start)
+        # keep one window behind the parse position, trimming in whole windows
+        drop = (self._pos - WINDOW_SIZE) // WINDOW_SIZE * WINDOW_SIZE
+        if drop >= STREAM_BLOCK:
+            self._chain.trim(drop)
+            self._pos -= drop
+
+    def _take(self) -> bytes:
+        """Returns and drops the output before the open flags byte."""
+        ready = self._flags_pos if self._bit else len(self._out)
+        out = bytes(self._out[:ready])
+        del self._out[:ready]
+        self._flags_pos -= ready
+        return out
+
+    def _encode(self, tokens: list[tuple[int, int]], i: int) -> None:
+        """Appends tokens parsed from _buf[i:] to the output."""
+        out = self._out
+        raw = self._buf
+        flags_pos = self._flags_pos
+        flags = self._flags
+        bit = self._bit
+        lz10 = self.MAGIC == 0x10
+
+        for length, disp in tokens:
+            if bit == 0:
+                flags_pos = len(out)
+                out.append(0)
+
+            if length:
+                # Mark this bit as "reference"
+                flags |= (0x80 >> bit)
+                disp_minus_1 = disp - 1
+
+                if lz10:
+                    # LZ10: length = t+3 where t in [0..15]
+                    t = length - 3
+                    out += bytes([(t << 4) | (disp_minus_1 >> 8), disp_minus_1 & 0xFF])
+                elif length <= 0x10:
+                    # 2-byte form: length = t+1 where t in [2..15]
+                    t = length - 1
+                    out += bytes([(t << 4) | (disp_minus_1 >> 8), disp_minus_1 & 0xFF])
+                elif length <= 0x110:
+                    # 3-byte form: length = x + 0x11, x in [0..0xFF]
+                    x = length - 0x11
+                    out += bytes([x >> 4, ((x & 0x0F) << 4) | (disp_minus_1 >> 8), disp_minus_1 & 0xFF])
+                else:
+                    # 4-byte form: length = x + 0x111, x in [0..0xFFFF]
+                    x = length - 0x111
+                    out += bytes([
+                        0x10 | (x >> 12),
+                        (x >> 4) & 0xFF,
+                        ((x & 0x0F) << 4) | (disp_minus_1 >> 8),
+                        disp_minus_1 & 0xFF,
+                    ])
+                i += length
+            else:
+                # Literal
+                out.append(raw[i])
+                i += 1
+
+            bit += 1
+            if bit == 8:
+                out[flags_pos] = flags
+                flags = 0
+                bit = 0
+
+        self._flags_pos = flags_pos
+        self._flags = flags
+        self._bit = bit
+
+class LZ10Compressor(_LZCompressor):
+    MAGIC = 0x10
+    MAX_LEN = LZ10_MAX_MATCH_LEN
+    TOKEN_BITS = staticmethod(_token_bits_lz10)
+
+class LZ11Compressor(_LZCompressor):
+    MAGIC = 0x11
+
+def lz10_compress(raw: bytes, level: str = "default", chain_depth: int | None = None) -> bytes:
+    c = LZ10Compressor(len(raw), level, chain_depth)
+    return c.feed(raw) + c.flush()
+
+def lz11_compress(raw: bytes, level: str = "default", chain_depth: int | None = None) -> bytes:
+    c = LZ11Compressor(len(raw), level, chain_depth)
+    return c.feed(raw) + c.flush()
+
+Codec = namedtuple("Codec", "name magic decompress compress decompressor compressor")
+
+# header byte -> codec; unpack picks by the first byte, pack by the recorded name
+CODECS = {
+    0x10: Codec("LZ10", 0x10, lz10_decompress, lz10_compress, LZ10Decompressor, LZ10Compressor),
+    0x11: Codec("LZ11", 0x11, lz11_decompress, lz11_compress, LZ11Decompressor, LZ11Compressor),
+}
+CODECS_BY_NAME = {c.name: c for c in CODECS.values()}
 
 def guess_ext(dec: bytes) -> str:
     if dec.startswith(b"darc"):
@@ -214,7 +779,137 @@ def guess_ext(dec: bytes) -> str:
         return ".sarc"
     return ".bin"
 
-def unpack_folder(input_dir: Path) -> Path:
+def _run_jobs(func, items: list, jobs: int):
+    """Yields func(item) for every item, in input order, using up to `jobs` processes."""
+    if jobs <= 1 or len(items) <= 1:
+        yield from map(func, items)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as ex:
+        yield from ex.map(func, items)
+
+def _file_sha1(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        while True:
+            b = f.read(chunk_size)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+
+def _load_manifest(path: Path) -> dict[str, dict]:
+    """Returns {source relpath: entry}; a missing or broken manifest is empty."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {e["source"]: e for e in data.get("files", [])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def _save_manifest(path: Path, entries: list[dict]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": MANIFEST_VERSION,
+        "files": sorted(entries, key=lambda e: e["source"]),
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _reuse_entry(p: Path, prev: dict | None, target: Path, **expect) -> dict | None:
+    """
+    Returns the (refreshed) manifest entry if p is unchanged since prev was
+    recorded and target still holds the output written back then, else None.
+    Size and mtime are checked first so unchanged files are not re-read.
+    """
+    if not prev:
+        return None
+    st = p.stat()
+    if prev.get("size") != st.st_size:
+        return None
+    for key, value in expect.items():
+        if prev.get(key) != value:
+            return None
+    if not target.is_file() or _file_sha1(target) != prev.get("output_sha1"):
+        return None
+    if prev.get("mtime_ns") != st.st_mtime_ns:
+        if _file_sha1(p) != prev.get("sha1"):
+            return None
+        prev = dict(prev, mtime_ns=st.st_mtime_ns)
+    return prev
+
+def _manifest_entry(rel: Path, p: Path, sha1: str, target_rel: Path, output_sha1: str, **extra) -> dict:
+    st = p.stat()
+    entry = {
+        "source": rel.as_posix(),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": sha1,
+        "output": target_rel.as_posix(),
+        "output_sha1": output_sha1,
+    }
+    entry.update(extra)
+    return entry
+
+def _pump(f, codec, out, in_hash, out_hash) -> int:
+    """Streams the rest of f through codec into out; returns bytes written."""
+    written = 0
+    while True:
+        chunk = f.read(STREAM_CHUNK)
+        if not chunk:
+            break
+        in_hash.update(chunk)
+        res = codec.feed(chunk)
+        out.write(res)
+        out_hash.update(res)
+        written += len(res)
+    res = codec.flush()
+    out.write(res)
+    out_hash.update(res)
+    return written + len(res)
+
+def _unpack_one(item: tuple[Path, dict | None], input_dir: Path, out_dir: Path) -> tuple[str, str, dict | None]:
+    """Returns (status, log line, manifest entry); status is "ok", "skip" or "fail"."""
+    p, prev = item
+    rel = p.relative_to(input_dir)
+    try:
+        if prev:
+            target = out_dir / prev["output"]
+            entry = _reuse_entry(p, prev, target)
+            if entry:
+                return ("ok", f"[OK]  {rel} -> {target.relative_to(out_dir)}  (degismedi)", entry)
+
+        with p.open("rb") as f:
+            first = f.read(STREAM_CHUNK)
+            codec = CODECS.get(first[0]) if first else None
+            if codec is None:
+                head_byte = f"0x{first[0]:02X}" if first else "bos dosya"
+                return ("skip", f"[SKIP] LZ10/LZ11 degil ({head_byte}): {rel}", None)
+
+            in_hash = hashlib.sha1(first)
+            out_hash = hashlib.sha1()
+            dc = codec.decompressor()
+            head = dc.feed(first)
+            # the extension comes from the first output bytes
+            while len(head) < 4 and not dc.eof:
+                chunk = f.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                in_hash.update(chunk)
+                head += dc.feed(chunk)
+
+            ext = guess_ext(head)
+            target = (out_dir / rel.parent / (p.stem + "_dec" + ext))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with target.open("wb") as out:
+                out.write(head)
+                out_hash.update(head)
+                size = len(head) + _pump(f, dc, out, in_hash, out_hash)
+
+        entry = _manifest_entry(rel, p, in_hash.hexdigest(), target.relative_to(out_dir), out_hash.hexdigest(),
+                                format=codec.name)
+        return ("ok", f"[OK]  {rel} -> {target.relative_to(out_dir)}  ({codec.name}, {size} bytes)", entry)
+    except Exception as e:
+        return ("fail", f"[FAIL] {rel}  -> {e}", None)
+
+def unpack_folder(input_dir: Path, jobs: int = 1, force: bool = False) -> Path:
     out_dir = input_dir.parent / (input_dir.name + "_DEC_OUT")
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -223,32 +918,79 @@ def unpack_folder(input_dir: Path) -> Path:
         print("Bu klasorde .zrc bulunamadi:", input_dir)
         return out_dir
 
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest = {} if force else _load_manifest(manifest_path)
+    items = [(p, manifest.get(p.relative_to(input_dir).as_posix())) for p in zrc_files]
+
     ok = 0
     fail = 0
-    for p in zrc_files:
-        rel = p.relative_to(input_dir)
-        try:
-            data = p.read_bytes()
-            if not data or data[0] != 0x11:
-                print(f"[SKIP] LZ11 degil (0x11 yok): {rel}")
-                continue
-
-            dec = lz11_decompress(data)
-            ext = guess_ext(dec)
-            target = (out_dir / rel.parent / (p.stem + "_dec" + ext))
-            target.parent.mkdir(parents=True, exist_ok=True)
-            target.write_bytes(dec)
+    entries = []
+    work = partial(_unpack_one, input_dir=input_dir, out_dir=out_dir)
+    for status, line, entry in _run_jobs(work, items, jobs):
+        if status == "ok":
             ok += 1
-            print(f"[OK]  {rel} -> {target.relative_to(out_dir)}  ({len(dec)} bytes)")
-        except Exception as e:
+        elif status == "fail":
             fail += 1
-            print(f"[FAIL] {rel}  -> {e}")
+        if entry:
+            entries.append(entry)
+        print(line)
 
+    _save_manifest(manifest_path, entries)
     print(f"\nUNPACK bitti. OK={ok}, FAIL={fail}")
     print("Cikti klasoru:", out_dir)
     return out_dir
 
-def pack_folder(dec_dir: Path) -> Path:
+def _original_zrc_root(dec_dir: Path) -> Path | None:
+    """The folder unpack read from, if dec_dir is an unpack output folder."""
+    if dec_dir.name.endswith("_DEC_OUT"):
+        root = dec_dir.parent / dec_dir.name[:-len("_DEC_OUT")]
+        if root.is_dir():
+            return root
+    return None
+
+def _pack_one(item: tuple[Path, dict | None, str], dec_dir: Path, out_dir: Path, level: str,
+              orig_root: Path | None) -> tuple[str, str, dict | None]:
+    """Returns (status, log line, manifest entry); status is "ok" or "fail"."""
+    p, prev, fmt = item
+    rel = p.relative_to(dec_dir)
+    try:
+        # Remove _dec suffix from name if present
+        base = p.stem
+        if base.endswith("_dec"):
+            base = base[:-4]
+
+        target = out_dir / rel.parent / (base + ".zrc")
+        entry = _reuse_entry(p, prev, target, level=level, format=fmt)
+        if entry:
+            return ("ok", f"[OK]  {rel} -> {target.relative_to(out_dir)}  (degismedi)", entry)
+
+        raw_size = p.stat().st_size
+        in_hash = hashlib.sha1()
+        out_hash = hashlib.sha1()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("rb") as f, target.open("wb") as out:
+            comp_size = _pump(f, CODECS_BY_NAME[fmt].compressor(raw_size, level), out, in_hash, out_hash)
+        entry = _manifest_entry(rel, p, in_hash.hexdigest(), target.relative_to(out_dir), out_hash.hexdigest(),
+                                level=level, format=fmt)
+
+        info = f"{fmt}, {comp_size} bytes"
+        if raw_size:
+            info += f", oran {comp_size / raw_size:.3f}"
+        orig = orig_root / rel.parent / (base + ".zrc") if orig_root else None
+        if orig is not None and orig.is_file():
+            orig_size = orig.stat().st_size
+            info += f", orijinal {orig_size} bytes ({comp_size - orig_size:+d}, {comp_size / orig_size:.3f}x)"
+        return ("ok", f"[OK]  {rel} -> {target.relative_to(out_dir)}  ({info})", entry)
+    except Exception as e:
+        return ("fail", f"[FAIL] {rel}  -> {e}", None)
+
+def _unpacked_formats(dec_dir: Path) -> dict[str, str]:
+    """{_dec file relpath: codec name} from the manifest unpack left in dec_dir."""
+    return {e["output"]: e.get("format", "LZ11") for e in _load_manifest(dec_dir / MANIFEST_NAME).values()
+            if "output" in e}
+
+def pack_folder(dec_dir: Path, level: str = "default", jobs: int = 1, force: bool = False,
+                fmt: str = "auto") -> Path:
     out_dir = dec_dir.parent / (dec_dir.name + "_PACKED_ZRC")
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -258,55 +1000,222 @@ def pack_folder(dec_dir: Path) -> Path:
         print("Bu klasorde _dec dosya bulunamadi:", dec_dir)
         return out_dir
 
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest = {} if force else _load_manifest(manifest_path)
+    # "auto" packs each file back into the format unpack found it in
+    formats = _unpacked_formats(dec_dir) if fmt == "auto" else {}
+    items = []
+    for p in candidates:
+        key = p.relative_to(dec_dir).as_posix()
+        items.append((p, manifest.get(key), formats.get(key, "LZ11") if fmt == "auto" else fmt))
+
     ok = 0
     fail = 0
-    for p in candidates:
-        rel = p.relative_to(dec_dir)
-        try:
-            raw = p.read_bytes()
-            comp = lz11_compress(raw)
+    entries = []
+    work = partial(_pack_one, dec_dir=dec_dir, out_dir=out_dir, level=level,
+                   orig_root=_original_zrc_root(dec_dir))
+    for status, line, entry in _run_jobs(work, items, jobs):
+        if status == "ok":
+            ok += 1
+        else:
+            fail += 1
+        if entry:
+            entries.append(entry)
+        print(line)
 
-            # Remove _dec suffix from name if present
-            base = p.stem
-            if base.endswith("_dec"):
-                base = base[:-4]
+    _save_manifest(manifest_path, entries)
+    print(f"\nPACK bitti. OK={ok}, FAIL={fail}")
+    print("Cikti klasoru:", out_dir)
+    return out_dir
 
-            target = out_dir / rel.parent / (base + ".zrc")
-            target.parent.mkdir(parents=True, exist_ok=True)
-            target.write_bytes(comp)
+def verify_folder(input_dir: Path) -> bool:
+    """Checks that lz11_decompress matches the reference decoder byte for byte."""
+    zrc_files = sorted(input_dir.rglob("*.zrc"))
+    if not zrc_files:
+        print("Bu klasorde .zrc bulunamadi:", input_dir)
+        return True
+
+    ok = 0
+    fail = 0
+    for p in zrc_files:
+        rel = p.relative_to(input_dir)
+        try:
+            data = p.read_bytes()
+            if not data or data[0] != 0x11:
+                print(f"[SKIP] LZ11 degil (0x11 yok): {rel}")
+                continue
+
+            fast = lz11_decompress(data)
+            ref = _lz11_decompress_ref(data)
+            if fast != ref:
+                fail += 1
+                print(f"[FAIL] {rel}  -> cikti farkli ({len(fast)} != {len(ref)} bytes)")
+                continue
             ok += 1
-            print(f"[OK]  {rel} -> {target.relative_to(out_dir)}  ({len(comp)} bytes)")
+            print(f"[OK]  {rel}  ({len(fast)} bytes)")
         except Exception as e:
             fail += 1
             print(f"[FAIL] {rel}  -> {e}")
 
-    print(f"\nPACK bitti. OK={ok}, FAIL={fail}")
-    print("Cikti klasoru:", out_dir)
-    return out_dir
+    print(f"\nVERIFY bitti. OK={ok}, FAIL={fail}")
+    return fail == 0
+
+def _peak_rss_kib() -> int | None:
+    """Peak resident set size of this process so far in KiB (None where unsupported); only ever grows."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def _peak_alloc_kib(fn, arg) -> int:
+    """Peak memory allocated by one fn(arg) call in KiB (tracemalloc, traced from zero)."""
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak // 1024
+
+def _synthetic_corpora(size: int) -> list[tuple[str, bytes]]:
+    rng = random.Random(0x11)
+    rnd = bytes(rng.getrandbits(8) for _ in range(size))
+
+    # highly repetitive: a short record repeated with a counter
+    rep = bytearray()
+    k = 0
+    while len(rep) < size:
+        rep += b"darc\xff\xfe\x1c\x00" + (k & 0xFF).to_bytes(4, "little") + bytes(20)
+        k += 1
+
+    # MSBT-like: UTF-16LE words with an occasional control tag and NUL
+    words = ["Pit", "Palutena", "Viridi", "the", "of", "Centurion", "weapon", "attack",
+             "Hades", "Underworld", "power", "Lady", "you", "can", "this", "is"]
+    txt = bytearray()
+    while len(txt) < size:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        txt += line.encode("utf-16-le")
+        txt += b"\x0e\x00\x00\x00\x03\x00\x02\x00" if rng.random() < 0.2 else b"\n\x00"
+        if rng.random() < 0.3:
+            txt += b"\x00\x00"
+
+    return [("random", rnd), ("repetitive", bytes(rep[:size])), ("msbt-text", bytes(txt[:size]))]
+
+def bench(folder: Path, levels: list[str], size: int, repeat: int, json_path: Path | None) -> list[dict]:
+    """
+    Times lz11_decompress/lz11_compress on the .zrc files in folder plus
+    synthetic data. Peak memory is measured per run with tracemalloc in one
+    extra untimed call, so rows can be compared.
+    """
+    corpora = []
+    for p in sorted(folder.rglob("*.zrc")):
+        data = p.read_bytes()
+        if data and data[0] == 0x11:
+            corpora.append((p.relative_to(folder).as_posix(), lz11_decompress(data)))
+    corpora += _synthetic_corpora(size)
+
+    def best_time(fn, arg) -> tuple[float, bytes]:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            res = fn(arg)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        return best, res
+
+    results = []
+    print(f"{'corpus':<28} {'level':<8} {'raw':>9} {'comp':>9} {'ratio':>6} {'pack MB/s':>10} {'unpack MB/s':>12} "
+          f"{'pack KiB':>9} {'unpack KiB':>10}")
+    for name, raw in corpora:
+        mb = len(raw) / (1024 * 1024)
+        for level in levels:
+            t_pack, comp = best_time(partial(lz11_compress, level=level), raw)
+            t_unpack, back = best_time(lz11_decompress, comp)
+            if back != raw:
+                raise ValueError(f"{name} ({level}): round-trip farkli!")
+            row = {
+                "corpus": name,
+                "level": level,
+                "raw_bytes": len(raw),
+                "comp_bytes": len(comp),
+                "ratio": len(comp) / len(raw) if raw else 0.0,
+                "pack_mb_s": mb / t_pack if t_pack else 0.0,
+                "unpack_mb_s": mb / t_unpack if t_unpack else 0.0,
+                "pack_peak_kib": _peak_alloc_kib(partial(lz11_compress, level=level), raw),
+                "unpack_peak_kib": _peak_alloc_kib(lz11_decompress, comp),
+            }
+            results.append(row)
+            print(f"{name:<28} {level:<8} {len(raw):>9} {len(comp):>9} {row['ratio']:>6.3f} "
+                  f"{row['pack_mb_s']:>10.2f} {row['unpack_mb_s']:>12.2f} "
+                  f"{row['pack_peak_kib']:>9} {row['unpack_peak_kib']:>10}")
+
+    rss = _peak_rss_kib()
+    if rss is not None:
+        print(f"Process peak RSS (tum calisma): {rss} KiB")
+
+    if json_path is not None:
+        json_path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "process_peak_rss_kib": rss,
+            "results": results,
+        }, indent=2), encoding="utf-8")
+        print("JSON:", json_path)
+    return results
 
 def main():
-    if len(sys.argv) < 3:
-        print(
-            "Kullanim:\n"
-            "  py -3 zrc_batch_lz11.py unpack \"KLASOR\"\n"
-            "  py -3 zrc_batch_lz11.py pack   \"DEC_KLASOR\"\n"
-        )
-        sys.exit(1)
+    ap = argparse.ArgumentParser(description="Batch LZ11 decompress/compress for .zrc files.")
+    sub = ap.add_subparsers(dest="mode", required=True)
 
-    mode = sys.argv[1].lower().strip()
-    folder = Path(sys.argv[2]).expanduser()
+    ap_u = sub.add_parser("unpack", help=".zrc dosyalarini ac (KLASOR_DEC_OUT).")
+    ap_u.add_argument("folder", help="KLASOR")
+    ap_u.add_argument("-j", "--jobs", type=int, default=1, help="Paralel islem sayisi (0 = cekirdek sayisi)")
+    ap_u.add_argument("--force", action="store_true", help="Manifest'i yok say, her dosyayi yeniden ac")
+
+    ap_p = sub.add_parser("pack", help="_dec dosyalarini tekrar .zrc yap (DEC_KLASOR_PACKED_ZRC).")
+    ap_p.add_argument("folder", help="DEC_KLASOR")
+    ap_p.add_argument("--level", choices=list(LEVELS), default="default",
+                      help="default: lazy matching; fast: greedy (default'tan ~%%25 hizli, ~%%2 buyuk); "
+                           "max: optimal parse + 4-byte form (default'tan ~10x yavas, ~%%3 kucuk)")
+    ap_p.add_argument("-j", "--jobs", type=int, default=1, help="Paralel islem sayisi (0 = cekirdek sayisi)")
+    ap_p.add_argument("--force", action="store_true", help="Manifest'i yok say, her dosyayi yeniden sikistir")
+    ap_p.add_argument("--format", choices=["auto"] + list(CODECS_BY_NAME), default="auto",
+                      help="auto: unpack'in kaydettigi orijinal format (yoksa LZ11)")
+
+    ap_v = sub.add_parser("verify", help="Hizli decompress'u referans decompress ile karsilastir.")
+    ap_v.add_argument("folder", help="KLASOR")
+
+    ap_b = sub.add_parser("bench", help="LZ11 hiz/oran olcumu (KLASOR .zrc + sentetik veri).")
+    ap_b.add_argument("folder", nargs="?", default=str(BENCH_DEFAULT_DIR),
+                      help="Icindeki .zrc dosyalari corpus olarak kullanilir (varsayilan: romfs/eu/menu)")
+    ap_b.add_argument("--level", action="append", choices=list(LEVELS),
+                      help="Olculecek seviye, birden fazla verilebilir (varsayilan: fast, default)")
+    ap_b.add_argument("--size", type=int, default=256 * 1024, help="Sentetik corpus boyutu (byte)")
+    ap_b.add_argument("--repeat", type=int, default=3, help="Her olcum kac kez tekrarlansin (en iyisi alinir)")
+    ap_b.add_argument("--json", help="Sonuclari bu JSON dosyasina yaz")
+
+    args = ap.parse_args()
+    folder = Path(args.folder).expanduser()
 
     if not folder.exists() or not folder.is_dir():
         print("Klasor bulunamadi:", folder)
         sys.exit(1)
 
-    if mode == "unpack":
-        unpack_folder(folder)
-    elif mode == "pack":
-        pack_folder(folder)
-    else:
-        print("Gecersiz mod:", mode, "(unpack veya pack yaz)")
-        sys.exit(1)
+    jobs = getattr(args, "jobs", 1)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+
+    if args.mode == "unpack":
+        unpack_folder(folder, jobs, args.force)
+    elif args.mode == "pack":
+        pack_folder(folder, args.level, jobs, args.force, args.format)
+    elif args.mode == "verify":
+        if not verify_folder(folder):
+            sys.exit(1)
+    elif args.mode == "bench":
+        bench(folder, args.level or ["fast", "default"], args.size, max(1, args.repeat),
+              Path(args.json) if args.json else None)
 
 if __name__ == "__main__":
     main()